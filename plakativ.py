@@ -12,7 +12,7 @@
 # the terms of the GNU General Public License version 3 as published by the
 # Free Software Foundation.
 
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 import math
 import fitz
 import sys
@@ -21,7 +21,13 @@ import os.path
 import platform
 from enum import Enum
 from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+import importlib.util
 import logging
+import multiprocessing
+import threading
 
 have_img2pdf = True
 try:
@@ -34,6 +40,49 @@ try:
 except ImportError:
     have_img2pdf = False
 
+# Importing numba takes longer than everything else plakativ does for most
+# posters, but it is only needed by the complex layouter. So the functions
+# decorated with @njit are only compiled with numba when one of them is called
+# for the first time. Without numba, they run as plain Python. Compiling takes
+# a few seconds for every new combination of argument types. The results are
+# cached on disk, so this mostly pays off on the command line and for library
+# users computing many layouts. The GUI does not use numba, see gui().
+have_numba = importlib.util.find_spec("numba") is not None
+_njit_functions = []
+
+
+def njit(*args, **kwargs):
+    def decorator(func):
+        _njit_functions.append((func, args, kwargs))
+
+        @wraps(func)
+        def wrapper(*func_args):
+            _compile_njit_functions()
+            return globals()[func.__name__](*func_args)
+
+        return wrapper
+
+    return decorator
+
+
+# replace all functions decorated with @njit at once, so that numba finds the
+# compiled versions when they call each other
+def _compile_njit_functions():
+    global have_numba
+    compile_func = None
+    if have_numba:
+        try:
+            from numba import njit as compile_func
+        except ImportError:
+            have_numba = False
+    for func, args, kwargs in _njit_functions:
+        if compile_func is None:
+            globals()[func.__name__] = func
+        else:
+            globals()[func.__name__] = compile_func(*args, **kwargs)(func)
+    _njit_functions.clear()
+
+
 have_tkinter = True
 try:
     import tkinter
@@ -67,6 +116,8 @@ PAGE_SIZES = OrderedDict(
         ("Tabloid (11 in × 17 in)", (279.4, 431.8)),
     ]
 )
+# maps a page size back to its name in PAGE_SIZES for the dropdown menus
+PAGE_SIZES_REVERSE = {v: k for k, v in PAGE_SIZES.items()}
 papersizes = {
     "letter": "8.5inx11in",
     "a0": "841mmx1189mm",
@@ -95,10 +146,20 @@ papernames = {
 Unit = Enum("Unit", "pt cm mm inch")
 
 
+# conversion factor from mm to pt for the hot loops in _render_pages()
+MM_TO_PT = 72.0 / 25.4
+
+
 def mm_to_pt(length):
     return (72.0 * length) / 25.4
 
 
+# Lengths in the GUI are shown with two decimals and go through Tcl, so two
+# lengths are treated as the same if they only differ by rounding errors.
+def lengths_near(a, b, eps=1e-4):
+    return len(a) == len(b) and all(abs(x - y) < eps for x, y in zip(a, b))
+
+
 def cm_to_mm(length):
     return length * 10.0
 
@@ -123,32 +184,56 @@ class LayoutNotComputedException(PlakativException):
     pass
 
 
+class AlphaChannelException(PlakativException):
+    pass
+
+
 def simple_cover(n, m, x, y):
-    pages_x_portrait = math.ceil(n / x)
-    pages_y_portrait = math.ceil(m / y)
-    pages_x_landscape = math.ceil(n / y)
-    pages_y_landscape = math.ceil(m / x)
-    if pages_x_portrait * pages_y_portrait <= pages_x_landscape * pages_y_landscape:
-        pages_x = pages_x_portrait
-        pages_y = pages_y_portrait
-        portrait = True
+    config, size = _simple_cover(n, m, x, y)
+    return list(config), size
+
+
+# compute_layout() and the GUI call simple_cover() and complex_cover() with the
+# same arguments over and over again, so their results are cached. The cached
+# layouts are tuples so that no caller can modify them.
+@lru_cache(maxsize=1024, typed=True)
+def _simple_cover(n, m, x, y):
+    pages_x, pages_y, portrait = _simple_cover_grid(n, m, x, y)
+    if portrait:
+        page_width, page_height = x, y
+    else:
+        page_width, page_height = y, x
+    size = pages_x * page_width, pages_y * page_height
+    config = tuple(
+        (px * page_width, py * page_height, portrait)
+        for py in range(pages_y)
+        for px in range(pages_x)
+    )
+    return config, size
+
+
+# orientation of the pages in the corners of the poster for each of the five
+# rotations checked by complex_cover(), four entries per rotation in the order
+# upper-left, upper-right, lower-right, lower-left
+COMPLEX_COVER_PORTRAIT = (
+    (True, True, True, False)
+    + (True, True, False, False)
+    + (True, False, True, False)
+    + (True, False, False, True)
+    + (True, False, False, False)
+)
+
+
+# Like simple_cover() but without computing the positions of the pages. Returns
+# the number of pages, the size of the area covered by them and whether the
+# pages are in portrait orientation.
+def simple_cover_count(n, m, x, y):
+    pages_x, pages_y, portrait = _simple_cover_grid(n, m, x, y)
+    if portrait:
         size = pages_x * x, pages_y * y
     else:
-        pages_x = pages_x_landscape
-        pages_y = pages_y_landscape
-        portrait = False
         size = pages_x * y, pages_y * x
-    config = list()
-    for py in range(pages_y):
-        for px in range(pages_x):
-            if portrait:
-                posx = px * x
-                posy = py * y
-            else:
-                posx = px * y
-                posy = py * x
-            config.append((posx, posy, portrait))
-    return config, size
+    return pages_x * pages_y, size, portrait
 
 
 # the function complex_cover() is based on a heuristic proposed by
@@ -173,136 +258,320 @@ def simple_cover(n, m, x, y):
 #   - there is no proof that the improved version is optimal either
 #   - we save some cpu cycles
 def complex_cover(n, m, x, y):
-    # each tuple-entry represents one of the corners of the poster
-    # upper-left, upper-right, lower-right, lower-left
-    portrait = (
-        (True, True, True, False),
-        (True, True, False, False),
-        (True, False, True, False),
-        (True, False, False, True),
-        (True, False, False, False),
+    return list(_complex_cover(n, m, x, y))
+
+
+@lru_cache(maxsize=128, typed=True)
+def _complex_cover(n, m, x, y):
+    num_rotations = _complex_cover_rotations(n, m, x, y)
+    minimum = math.ceil((n * m) / (x * y))
+    cover, _, _ = simple_cover_count(n, m, x, y)
+    if cover == minimum:
+        config, _ = _simple_cover(n, m, x, y)
+        return config
+
+    # the search only counts pages and remembers the parameters of the best
+    # layout, so the page positions are only computed for the winner
+    cover, r, w0, h0, w2, h2 = _complex_cover_search(
+        n, m, x, y, num_rotations, minimum, cover
     )
-    X = lambda r, d: x if portrait[r][d] else y
-    Y = lambda r, d: y if portrait[r][d] else x
+    if r < 0:
+        # no layout needs less pages than the simple cover
+        config, _ = _simple_cover(n, m, x, y)
+        return config
+    return tuple(_complex_cover_config(n, m, x, y, r, w0, h0, w2, h2))
+
+
+@njit(cache=True)
+def _complex_cover_rotations(n, m, x, y):
     if x == y:
         # if page sizes are square, only one rotation has to be checked
-        num_rotations = 1
-    elif n == m:
+        return 1
+    if n == m:
         # if the poster size is a square, rotation 4 and 5 (which are itself
         # just rotations of rotations 2 and 1, respectively) do not need to be
         # checked
-        num_rotations = 3
-    else:
-        num_rotations = 5
+        return 3
+    return 5
+
+
+# Same as len(complex_cover(n, m, x, y)) but without computing the positions of
+# the pages, so that it can be compiled with numba and called in a loop by
+# _complex_cover_max_area_mult().
+@njit(cache=True)
+def _complex_cover_count(n, m, x, y):
     minimum = math.ceil((n * m) / (x * y))
-    config, _ = simple_cover(n, m, x, y)
-    cover = len(config)
+    pages_x, pages_y, _ = _simple_cover_grid(n, m, x, y)
+    cover = pages_x * pages_y
     if cover == minimum:
-        return config
-
+        return cover
+    num_rotations = _complex_cover_rotations(n, m, x, y)
+    return _complex_cover_search(n, m, x, y, num_rotations, minimum, cover)[0]
+
+
+# Bisect the poster area (as a multiple of the input page area) between
+# min_area_mult and max_area_mult until the largest area is found that can be
+# covered with npages pages by the complex layouter.
+@njit(cache=True)
+def _complex_cover_max_area_mult(
+    npages,
+    min_area_mult,
+    max_area_mult,
+    inpage_width,
+    inpage_height,
+    printable_width,
+    printable_height,
+):
+    # The number of pages only grows in steps with the poster size, so
+    # interpolating between the number of pages at both ends of the interval
+    # (regula falsi or secant method) does not find the step any faster than
+    # plain bisection does.
+    while abs(min_area_mult - max_area_mult) >= 0.001:
+        new_area_mult = (min_area_mult + max_area_mult) / 2
+        new_area_npages = _complex_cover_count(
+            math.sqrt(new_area_mult) * inpage_width,
+            math.sqrt(new_area_mult) * inpage_height,
+            printable_width,
+            printable_height,
+        )
+        if new_area_npages > npages:
+            max_area_mult = new_area_mult
+        else:
+            min_area_mult = new_area_mult
+    return min_area_mult
+
+
+# The search for the best complex cover is a tight loop over plain numbers and
+# is compiled with numba if it is available. Because of that it does not build
+# any lists but only returns the number of pages of the best layout it found
+# together with the rotation r and the values w0, h0, w2 and h2 which are
+# enough to reconstruct that layout with _complex_cover_config().
+@njit(cache=True)
+def _complex_cover_search(n, m, x, y, num_rotations, minimum, cover):
+    X_TAB = [x if p else y for p in COMPLEX_COVER_PORTRAIT]
+    Y_TAB = [y if p else x for p in COMPLEX_COVER_PORTRAIT]
+    best = (cover, -1, 0, 0, 0, 0)
     for r in range(num_rotations):
+        X0, X1, X2, X3 = X_TAB[4 * r : 4 * r + 4]
+        Y0, Y1, Y2, Y3 = Y_TAB[4 * r : 4 * r + 4]
+        # The width of the upper right corner pages only depends on the width
+        # of the upper left corner pages and so on, so these pairs together
+        # with the length they cover are computed once per rotation instead
+        # of in the innermost loop.
         # w0 -> width of upper left corner pages
-        for w0 in range(1, math.ceil(n / X(r, 0))):
-            # w1 -> width of upper right corner pages
-            w1 = math.ceil((n - w0 * X(r, 0)) / X(r, 1))
-            if w1 < 0:
-                w1 = 0
-            # h0 -> height of upper left corner pages
-            for h0 in range(1, math.ceil(m / Y(r, 0))):
-                # h3 -> height of lower left corner pages
-                h3 = math.ceil((m - h0 * Y(r, 0)) / Y(r, 3))
-                if h3 < 0:
-                    h3 = 0
-                # w2 -> width of lower right corner pages
-                for w2 in range(1, math.ceil(n / X(r, 2))):
-                    # w3 -> width of lower left corner pages
-                    w3 = math.ceil((n - w2 * X(r, 2)) / X(r, 3))
-                    if w3 < 0:
-                        w3 = 0
-                    # h2 -> height of lower right corner pages
-                    for h2 in range(1, math.ceil(m / Y(r, 2))):
-                        # h1 -> height of upper right corner pages
-                        h1 = math.ceil((m - h2 * Y(r, 2)) / Y(r, 1))
-                        if h1 < 0:
-                            h1 = 0
-                        newconfig = list()
-                        # upper-left (w0,h0)
-                        for i in range(w0):
-                            for j in range(h0):
-                                newconfig.append(
-                                    (i * X(r, 0), j * Y(r, 0), portrait[r][0])
-                                )
-                        # upper-right (w1,h1)
-                        for i in range(w1):
-                            for j in range(h1):
-                                newconfig.append(
-                                    (
-                                        n - w1 * X(r, 1) + i * X(r, 1),
-                                        j * Y(r, 1),
-                                        portrait[r][1],
-                                    )
-                                )
-                        # lower-right (w2,h2)
-                        for i in range(w2):
-                            for j in range(h2):
-                                newconfig.append(
-                                    (
-                                        n - w2 * X(r, 2) + i * X(r, 2),
-                                        m - h2 * Y(r, 2) + j * Y(r, 2),
-                                        portrait[r][2],
-                                    )
-                                )
-                        # lower-left (w3,h3)
-                        for i in range(w3):
-                            for j in range(h3):
-                                newconfig.append(
-                                    (
-                                        i * X(r, 3),
-                                        m - h3 * Y(r, 3) + j * Y(r, 3),
-                                        portrait[r][3],
-                                    )
-                                )
+        # w1 -> width of upper right corner pages
+        widths_top = _complex_cover_pairs(n, X0, X1)
+        # h0 -> height of upper left corner pages
+        # h3 -> height of lower left corner pages
+        heights_left = _complex_cover_pairs(m, Y0, Y3)
+        # w2 -> width of lower right corner pages
+        # w3 -> width of lower left corner pages
+        widths_bottom = _complex_cover_pairs(n, X2, X3)
+        # h2 -> height of lower right corner pages
+        # h1 -> height of upper right corner pages
+        heights_right = _complex_cover_pairs(m, Y2, Y1)
+        if (
+            len(widths_top) == 0
+            or len(heights_left) == 0
+            or len(widths_bottom) == 0
+            or len(heights_right) == 0
+        ):
+            continue
+        # smallest values that w3, h1 and h0 as well as the number of pages
+        # along each side can take in the loops below
+        min_w01 = widths_top[0][0] + widths_top[0][1]
+        for w0, w1, _, _ in widths_top:
+            min_w01 = min(min_w01, w0 + w1)
+        min_h0 = heights_left[0][0]
+        min_h03 = heights_left[0][0] + heights_left[0][1]
+        for h0, h3, _, _ in heights_left:
+            min_h0 = min(min_h0, h0)
+            min_h03 = min(min_h03, h0 + h3)
+        min_w3 = widths_bottom[0][1]
+        min_w23 = widths_bottom[0][0] + widths_bottom[0][1]
+        for w2, w3, _, _ in widths_bottom:
+            min_w3 = min(min_w3, w3)
+            min_w23 = min(min_w23, w2 + w3)
+        min_h1 = heights_right[0][1]
+        min_h21 = heights_right[0][0] + heights_right[0][1]
+        for h2, h1, _, _ in heights_right:
+            min_h1 = min(min_h1, h1)
+            min_h21 = min(min_h21, h2 + h1)
+        # Skip the whole rotation if not even its smallest possible number of
+        # corner pages can improve on the best layout so far. As every corner
+        # has at least one page in each direction, there are at least as many
+        # corner pages as pages along the top and bottom sides together and
+        # as pages along the left and right sides together. Like the bounds
+        # in the loops below, this never skips a layout with the minimal
+        # number of pages.
+        lower_bound = max(min_w01 + min_w23, min_h03 + min_h21)
+        if lower_bound >= cover and lower_bound > minimum:
+            continue
+        # The width of the hole in the center only depends on the pages in
+        # the top and bottom rows and its height only on the pages in the
+        # left and right columns, so instead of dividing the hole by the page
+        # size in the innermost loop, the number of pages it needs in either
+        # orientation is looked up from tables computed once per rotation.
+        # Each table is indexed by the pairs in the order in which their
+        # lengths are subtracted because changing that order could change the
+        # rounding.
+        holes_x_02 = _complex_cover_holes(
+            n, [p[2] for p in widths_top], [p[2] for p in widths_bottom], x, y
+        )
+        holes_y_02 = _complex_cover_holes(
+            m, [p[3] for p in heights_right], [p[3] for p in heights_left], x, y
+        )
+        holes_x_13 = _complex_cover_holes(
+            n, [p[3] for p in widths_top], [p[3] for p in widths_bottom], x, y
+        )
+        holes_y_13 = _complex_cover_holes(
+            m, [p[2] for p in heights_left], [p[2] for p in heights_right], x, y
+        )
+        for i0 in range(len(widths_top)):
+            w0, w1, _, _ = widths_top[i0]
+            lower_bound = w0 * min_h0 + w1 * min_h1 + min_w23
+            if lower_bound >= cover and lower_bound > minimum:
+                continue
+            for j0 in range(len(heights_left)):
+                h0, h3, _, _ = heights_left[j0]
+                # Branch and bound: skip the two innermost loops if not even
+                # their smallest possible number of corner pages can improve
+                # on the best layout so far. A layout with the minimal number
+                # of pages would be returned right away, so make sure that it
+                # is never skipped.
+                lower_bound = w0 * h0 + w1 * min_h1 + 1 + min_w3 * h3
+                if lower_bound >= cover and lower_bound > minimum:
+                    continue
+                for i2 in range(len(widths_bottom)):
+                    w2, w3, _, _ = widths_bottom[i2]
+                    for j2 in range(len(heights_right)):
+                        h2, h1, _, _ = heights_right[j2]
+                        total = w0 * h0 + w1 * h1 + w2 * h2 + w3 * h3
+                        # the center cover can only add more pages
+                        if total >= cover and total > minimum:
+                            continue
 
                         # if neither rectangle 0 overlaps with rectangle 2 nor
                         # does rectangle 1 overlap with rectangle 3 in the center,
                         # then a center cover has to be added
-                        X4 = n - w0 * X(r, 0) - w2 * X(r, 2)
-                        Y4 = m - h1 * Y(r, 1) - h3 * Y(r, 3)
-                        simple_config = []
+                        X4, X4_x, X4_y = holes_x_02[i0][i2]
+                        Y4, Y4_x, Y4_y = holes_y_02[j2][j0]
+                        if not (X4 > 0 and Y4 > 0):
+                            X4, X4_x, X4_y = holes_x_13[i0][i2]
+                            Y4, Y4_x, Y4_y = holes_y_13[j0][j2]
                         if X4 > 0 and Y4 > 0:
-                            simple_config, (sx, sy) = simple_cover(X4, Y4, x, y)
-                            # shift the results such that they are in the center
-                            for cx, cy, p in simple_config:
-                                newconfig.append(
-                                    (
-                                        w0 * X(r, 0) + (X4 - sx) / 2 + cx,
-                                        h1 * Y(r, 1) + (Y4 - sy) / 2 + cy,
-                                        p,
-                                    )
-                                )
-                        else:
-                            X4 = n - w1 * X(r, 1) - w3 * X(r, 3)
-                            Y4 = m - h0 * Y(r, 0) - h2 * Y(r, 2)
-                            if X4 > 0 and Y4 > 0:
-                                simple_config, (sx, sy) = simple_cover(X4, Y4, x, y)
-                                # shift the results such that they are in the center
-                                for cx, cy, p in simple_config:
-                                    newconfig.append(
-                                        (
-                                            w3 * X(r, 3) + (X4 - sx) / 2 + cx,
-                                            h0 * Y(r, 0) + (Y4 - sy) / 2 + cy,
-                                            p,
-                                        )
-                                    )
-                        total = len(newconfig)
+                            # same choice of orientation as in simple_cover()
+                            total += min(X4_x * Y4_y, X4_y * Y4_x)
                         # shortcut to cut computation short in case a
                         # solution with the minimal possible number of
                         # pages is found
                         if total == minimum:
-                            return newconfig
+                            return (total, r, w0, h0, w2, h2)
                         if total < cover:
                             cover = total
-                            config = newconfig
+                            best = (total, r, w0, h0, w2, h2)
+    return best
+
+
+# For each number k of pages of length a at one end of a side of the given
+# length, the number l of pages of length b that are needed to cover the rest
+# of that side, together with the lengths k*a and l*b they cover.
+@njit(cache=True)
+def _complex_cover_pairs(length, a, b):
+    pairs = []
+    for k in range(1, math.ceil(length / a)):
+        l = max(0, math.ceil((length - k * a) / b))
+        pairs.append((k, l, k * a, l * b))
+    return pairs
+
+
+# For the hole of the given length that remains between two opposite corner
+# rectangles covering lengths_a[i] and lengths_b[j], its length and the number
+# of pages of length x and of length y that are needed to cover it.
+@njit(cache=True)
+def _complex_cover_holes(length, lengths_a, lengths_b, x, y):
+    holes = []
+    for len_a in lengths_a:
+        row = []
+        for len_b in lengths_b:
+            hole = length - len_a - len_b
+            if hole > 0:
+                row.append((hole, math.ceil(hole / x), math.ceil(hole / y)))
+            else:
+                row.append((hole, 0, 0))
+        holes.append(row)
+    return holes
+
+
+# number of pages in x and y direction and their orientation as chosen by
+# simple_cover()
+@njit(cache=True)
+def _simple_cover_grid(n, m, x, y):
+    pages_x_portrait = math.ceil(n / x)
+    pages_y_portrait = math.ceil(m / y)
+    pages_x_landscape = math.ceil(n / y)
+    pages_y_landscape = math.ceil(m / x)
+    if pages_x_portrait * pages_y_portrait <= pages_x_landscape * pages_y_landscape:
+        return pages_x_portrait, pages_y_portrait, True
+    return pages_x_landscape, pages_y_landscape, False
+
+
+# compute the page positions of the layout found by _complex_cover_search()
+def _complex_cover_config(n, m, x, y, r, w0, h0, w2, h2):
+    P0, P1, P2, P3 = COMPLEX_COVER_PORTRAIT[4 * r : 4 * r + 4]
+    X0, X1, X2, X3 = [x if p else y for p in (P0, P1, P2, P3)]
+    Y0, Y1, Y2, Y3 = [y if p else x for p in (P0, P1, P2, P3)]
+    w1 = max(0, math.ceil((n - w0 * X0) / X1))
+    h3 = max(0, math.ceil((m - h0 * Y0) / Y3))
+    w3 = max(0, math.ceil((n - w2 * X2) / X3))
+    h1 = max(0, math.ceil((m - h2 * Y2) / Y1))
+    # upper-left (w0,h0)
+    config = [(i * X0, j * Y0, P0) for i in range(w0) for j in range(h0)]
+    # upper-right (w1,h1)
+    config.extend(
+        (n - w1 * X1 + i * X1, j * Y1, P1) for i in range(w1) for j in range(h1)
+    )
+    # lower-right (w2,h2)
+    config.extend(
+        (n - w2 * X2 + i * X2, m - h2 * Y2 + j * Y2, P2)
+        for i in range(w2)
+        for j in range(h2)
+    )
+    # lower-left (w3,h3)
+    config.extend(
+        (i * X3, m - h3 * Y3 + j * Y3, P3) for i in range(w3) for j in range(h3)
+    )
+
+    # if neither rectangle 0 overlaps with rectangle 2 nor does rectangle 1
+    # overlap with rectangle 3 in the center, then a center cover has to be
+    # added
+    X4 = n - w0 * X0 - w2 * X2
+    Y4 = m - h1 * Y1 - h3 * Y3
+    if X4 > 0 and Y4 > 0:
+        simple_config, (sx, sy) = _simple_cover(X4, Y4, x, y)
+        # shift the results such that they are in the center
+        for cx, cy, p in simple_config:
+            config.append(
+                (
+                    w0 * X0 + (X4 - sx) / 2 + cx,
+                    h1 * Y1 + (Y4 - sy) / 2 + cy,
+                    p,
+                )
+            )
+    else:
+        X4 = n - w1 * X1 - w3 * X3
+        Y4 = m - h0 * Y0 - h2 * Y2
+        if X4 > 0 and Y4 > 0:
+            simple_config, (sx, sy) = _simple_cover(X4, Y4, x, y)
+            # shift the results such that they are in the center
+            for cx, cy, p in simple_config:
+                config.append(
+                    (
+                        w3 * X3 + (X4 - sx) / 2 + cx,
+                        h0 * Y0 + (Y4 - sy) / 2 + cy,
+                        p,
+                    )
+                )
     return config
 
 
@@ -317,6 +586,9 @@ class Plakativ:
             else:
                 self.doc = fitz.open(filename=infile)
         self.pagenr = pagenr
+        self._displaylist = None
+        self._page_sizes = {}
+        self._layouts = OrderedDict()
 
     # set page number -- first page is 0
     def set_input_pagenr(self, pagenr):
@@ -330,22 +602,40 @@ class Plakativ:
     def get_input_pagenums(self):
         return len(self.doc)
 
+    # Creating the display list of a page means interpreting its content, so
+    # it is only done once and then shared by get_input_page_size(),
+    # get_image(), compute_layout() and render() until another input page is
+    # selected. The page size is stored alongside so that it does not have to
+    # be fetched from MuPDF every time either.
+    def _get_displaylist(self):
+        if self._displaylist is None or self._displaylist[0] != self.pagenr:
+            page = self.doc[self.pagenr]
+            # since pymupdf 1.19.0 a warning will be issued if the deprecated names are used
+            if hasattr(page, "get_displaylist"):
+                gdl = page.get_displaylist
+            else:
+                gdl = page.getDisplayList
+            # this may fail with "RuntimeError: image is too wide"
+            # from pdf_load_image_imp() in pdf-image.c from mupdf for sizes larger
+            # than 1<<16 pixels:
+            # https://bugs.ghostscript.com/show_bug.cgi?id=703839
+            dl = gdl()
+            self._displaylist = (self.pagenr, dl, (dl.rect.width, dl.rect.height))
+            self._page_sizes[self.pagenr] = self._displaylist[2]
+        return self._displaylist[1]
+
+    # the sizes of all pages seen so far are remembered, so that going back to
+    # a page does not create its display list again just to get its size
     def get_input_page_size(self):
-        # since pymupdf 1.19.0 a warning will be issued if the deprecated names are used
-        if hasattr(self.doc[self.pagenr], "get_displaylist"):
-            gdl = self.doc[self.pagenr].get_displaylist
-        else:
-            gdl = self.doc[self.pagenr].getDisplayList
-        rect = gdl().rect
-        return (rect.width, rect.height)
+        size = self._page_sizes.get(self.pagenr)
+        if size is None:
+            self._get_displaylist()
+            size = self._displaylist[2]
+        return size
 
     def get_image(self, zoom):
         mat_0 = fitz.Matrix(zoom, zoom)
-        # since pymupdf 1.19.0 a warning will be issued if the deprecated names are used
-        if hasattr(self.doc[self.pagenr], "get_displaylist"):
-            gdl = self.doc[self.pagenr].get_displaylist()
-        else:
-            gdl = self.doc[self.pagenr].getDisplayList()
+        gdl = self._get_displaylist()
         if hasattr(gdl, "get_pixmap"):
             pix = gdl.get_pixmap(matrix=mat_0, alpha=False)
         else:
@@ -361,6 +651,9 @@ class Plakativ:
             # function does
             return pix._getImageData(2)  # 2 stands for pgm/ppm/pbm
 
+    # The GUI computes the layout for the same values over and over again, for
+    # example when switching back and forth between the layouters, so the
+    # layouts of the last 64 different calls are kept.
     def compute_layout(
         self,
         mode,
@@ -370,6 +663,31 @@ class Plakativ:
         pagesize=(210, 297),
         border=(0, 0, 0, 0),
         strategy="simple",
+    ):
+        key = (
+            self.pagenr,
+            mode,
+            None if postersize is None else tuple(postersize),
+            mult,
+            npages,
+            tuple(pagesize),
+            tuple(border),
+            strategy,
+        )
+        if key in self._layouts:
+            self._layouts.move_to_end(key)
+        else:
+            result = self._compute_layout(
+                mode, postersize, mult, npages, pagesize, border, strategy
+            )
+            self._layouts[key] = (self.layout, result)
+            if len(self._layouts) > 64:
+                self._layouts.popitem(last=False)
+        self.layout, result = self._layouts[key]
+        return result
+
+    def _compute_layout(
+        self, mode, postersize, mult, npages, pagesize, border, strategy
     ):
         border_top, border_right, border_bottom, border_left = border
 
@@ -387,18 +705,9 @@ class Plakativ:
         printable_height = self.layout["output_pagesize"][1] - (
             border_top + border_bottom
         )
-        # since pymupdf 1.19.0 a warning will be issued if the deprecated names are used
-        if hasattr(self.doc[self.pagenr], "get_displaylist"):
-            gdl = self.doc[self.pagenr].get_displaylist
-        else:
-            gdl = self.doc[self.pagenr].getDisplayList
-        # this may fail with "RuntimeError: image is too wide"
-        # from pdf_load_image_imp() in pdf-image.c from mupdf for sizes larger
-        # than 1<<16 pixels:
-        # https://bugs.ghostscript.com/show_bug.cgi?id=703839
-        rect = gdl().rect
-        inpage_width = pt_to_mm(rect.width)
-        inpage_height = pt_to_mm(rect.height)
+        width, height = self.get_input_page_size()
+        inpage_width = pt_to_mm(width)
+        inpage_height = pt_to_mm(height)
 
         if mode in ["size", "mult"]:
             if mode == "size":
@@ -426,43 +735,50 @@ class Plakativ:
             else:
                 raise Exception("unsupported mode: %s" % mode)
         elif mode == "npages":
-            # stupid bruteforce algorithm to determine the largest printable
-            # postersize with N pages
+            # determine the largest printable postersize with N pages by
+            # trying all grids of x times y pages. For a given number of
+            # columns x, the poster can only grow with the number of rows, so
+            # only the largest number of rows y that still fits into N pages
+            # has to be considered. Likewise, for a given number of rows, only
+            # the largest number of columns has to be considered, so there
+            # are only about 2*sqrt(N) grids to try.
             best_area = 0
             best = None
-            for x in range(1, npages + 1):
-                for y in range(1, npages + 1):
-                    if x * y > npages:
-                        continue
-                    width_portrait = x * printable_width
-                    height_portrait = y * printable_height
+            x = 1
+            while x <= npages:
+                y = npages // x
+                x = npages // y
+                width_portrait = x * printable_width
+                height_portrait = y * printable_height
+
+                poster_width = width_portrait
+                poster_height = (poster_width * inpage_height) / inpage_width
+                if poster_height > height_portrait:
+                    poster_height = height_portrait
+                    poster_width = (poster_height * inpage_width) / inpage_height
 
-                    poster_width = width_portrait
-                    poster_height = (poster_width * inpage_height) / inpage_width
-                    if poster_height > height_portrait:
-                        poster_height = height_portrait
-                        poster_width = (poster_height * inpage_width) / inpage_height
+                area_portrait = poster_width * poster_height
 
-                    area_portrait = poster_width * poster_height
+                if area_portrait > best_area:
+                    best_area = area_portrait
+                    best = (poster_width, poster_height)
 
-                    if area_portrait > best_area:
-                        best_area = area_portrait
-                        best = (poster_width, poster_height)
+                width_landscape = x * printable_height
+                height_landscape = y * printable_width
 
-                    width_landscape = x * printable_height
-                    height_landscape = y * printable_width
+                poster_width = width_landscape
+                poster_height = (poster_width * inpage_height) / inpage_width
+                if poster_height > height_landscape:
+                    poster_height = height_landscape
+                    poster_width = (poster_height * inpage_width) / inpage_height
 
-                    poster_width = width_landscape
-                    poster_height = (poster_width * inpage_height) / inpage_width
-                    if poster_height > height_landscape:
-                        poster_height = height_landscape
-                        poster_width = (poster_height * inpage_width) / inpage_height
+                area_landscape = poster_width * poster_height
 
-                    area_landscape = poster_width * poster_height
+                if area_landscape > best_area:
+                    best_area = area_landscape
+                    best = (poster_width, poster_height)
 
-                    if area_landscape > best_area:
-                        best_area = area_landscape
-                        best = (poster_width, poster_height)
+                x += 1
 
             poster_width, poster_height = best
 
@@ -478,11 +794,6 @@ class Plakativ:
                 )
                 # to avoid floating point errors later
                 min_area_mult *= 0.9999
-                min_area_npages = len(
-                    complex_cover(
-                        poster_width, poster_height, printable_width, printable_height
-                    )
-                )
 
                 # the maximum possible size is a poster of the area created by
                 # multiplying the individual page areas by the maximum number
@@ -490,31 +801,16 @@ class Plakativ:
                 max_area_mult = (npages * printable_width * printable_height) / (
                     inpage_width * inpage_height
                 )
-                max_area_npages = len(
-                    complex_cover(
-                        math.sqrt(max_area_mult) * inpage_width,
-                        math.sqrt(max_area_mult) * inpage_height,
-                        printable_width,
-                        printable_height,
-                    )
-                )
 
-                while True:
-                    if abs(min_area_mult - max_area_mult) < 0.001:
-                        break
-                    new_area_mult = (min_area_mult + max_area_mult) / 2
-                    new_area_npages = len(
-                        complex_cover(
-                            math.sqrt(new_area_mult) * inpage_width,
-                            math.sqrt(new_area_mult) * inpage_height,
-                            printable_width,
-                            printable_height,
-                        )
-                    )
-                    if new_area_npages > npages:
-                        max_area_mult = new_area_mult
-                    else:
-                        min_area_mult = new_area_mult
+                min_area_mult = _complex_cover_max_area_mult(
+                    npages,
+                    min_area_mult,
+                    max_area_mult,
+                    inpage_width,
+                    inpage_height,
+                    printable_width,
+                    printable_height,
+                )
 
                 poster_width = inpage_width * math.sqrt(min_area_mult)
                 poster_height = inpage_height * math.sqrt(min_area_mult)
@@ -564,28 +860,24 @@ class Plakativ:
             )
 
         # positions are relative to self.layout["posterpos"]
-        self.layout["positions"] = []
-        for y in range(pages_y):
-            for x in range(pages_x):
-                if portrait:
-                    posx = (
-                        x * printable_width
-                        - (pages_x * printable_width - poster_width) / 2
-                    )
-                    posy = (
-                        y * printable_height
-                        - (pages_y * printable_height - poster_height) / 2
-                    )
-                else:
-                    posx = (
-                        x * printable_height
-                        - (pages_x * printable_height - poster_width) / 2
-                    )
-                    posy = (
-                        y * printable_width
-                        - (pages_y * printable_width - poster_height) / 2
-                    )
-                self.layout["positions"].append((posx, posy, portrait))
+        # all pages in a column share their x coordinate and all pages in a row
+        # share their y coordinate, so compute these only once per column and
+        # row, respectively
+        if portrait:
+            page_width, page_height = printable_width, printable_height
+        else:
+            page_width, page_height = printable_height, printable_width
+        columns = [
+            x * page_width - (pages_x * page_width - poster_width) / 2
+            for x in range(pages_x)
+        ]
+        rows = [
+            y * page_height - (pages_y * page_height - poster_height) / 2
+            for y in range(pages_y)
+        ]
+        self.layout["positions"] = [
+            (posx, posy, portrait) for posy in rows for posx in columns
+        ]
 
         if strategy == "complex":
             positions_complex = complex_cover(
@@ -649,69 +941,77 @@ class Plakativ:
 
         return postersize, mult, npages
 
-    def render(self, outfile, cover=False, guides=False, numbers=False, border=False):
+    # Pages are rendered by jobs worker processes in parallel or by all
+    # available CPUs if jobs is None. The default is to render them one after
+    # another without starting any additional processes. Posters with only one
+    # or two pages are always rendered without additional processes because
+    # starting them takes longer than rendering the pages.
+    def render(
+        self,
+        outfile,
+        cover=False,
+        guides=False,
+        numbers=False,
+        border=False,
+        jobs=1,
+    ):
         if not hasattr(self, "layout"):
             raise LayoutNotComputedException()
 
-        # since pymupdf 1.19.0 a warning will be issued if the deprecated names are used
-        if hasattr(self.doc[self.pagenr], "get_displaylist"):
-            gdl = self.doc[self.pagenr].get_displaylist
-        else:
-            gdl = self.doc[self.pagenr].getDisplayList
-        inpage_width = pt_to_mm(gdl().rect.width)
+        inpage_width = pt_to_mm(self.get_input_page_size()[0])
 
         outdoc = fitz.open()
 
         if cover:
+            output_width, output_height = self.layout["output_pagesize"]
+            border_top = self.layout["border_top"]
+            border_right = self.layout["border_right"]
+            border_bottom = self.layout["border_bottom"]
+            border_left = self.layout["border_left"]
+            output_width_pt = mm_to_pt(output_width)
+            output_height_pt = mm_to_pt(output_height)
+            overall_width, overall_height = self.layout["overallsize"]
             # factor to convert from output poster dimensions (given in mm) into
             # pdf dimensions (given in pt)
             zoom_1 = min(
-                mm_to_pt(
-                    self.layout["output_pagesize"][0]
-                    - 2 * max(self.layout["border_left"], self.layout["border_right"])
-                )
-                / (self.layout["overallsize"][0]),
-                mm_to_pt(
-                    self.layout["output_pagesize"][1]
-                    - 2 * max(self.layout["border_top"], self.layout["border_bottom"])
-                )
-                / (self.layout["overallsize"][1]),
+                mm_to_pt(output_width - 2 * max(border_left, border_right))
+                / overall_width,
+                mm_to_pt(output_height - 2 * max(border_top, border_bottom))
+                / overall_height,
             )
+            poster_x, poster_y = self.layout["posterpos"]
+            # offset that centers the overall size on the cover page
+            offset_x = (output_width_pt - zoom_1 * overall_width) / 2
+            offset_y = (output_height_pt - zoom_1 * overall_height) / 2
+
             # since pymupdf 1.19.0 a warning will be issued if the deprecated names are used
             if hasattr(outdoc, "new_page"):
                 np = outdoc.new_page
             else:
                 np = outdoc.newPage
-
             page = np(
                 -1,  # insert after last page
-                width=mm_to_pt(self.layout["output_pagesize"][0]),
-                height=mm_to_pt(self.layout["output_pagesize"][1]),
+                width=output_width_pt,
+                height=output_height_pt,
             )
             for i, (x, y, portrait) in enumerate(self.layout["positions"]):
-                x0 = (x + self.layout["posterpos"][0]) * zoom_1 + (
-                    mm_to_pt(self.layout["output_pagesize"][0])
-                    - zoom_1 * self.layout["overallsize"][0]
-                ) / 2
-                y0 = (y + self.layout["posterpos"][1]) * zoom_1 + (
-                    mm_to_pt(self.layout["output_pagesize"][1])
-                    - zoom_1 * self.layout["overallsize"][1]
-                ) / 2
+                x0 = (x + poster_x) * zoom_1 + offset_x
+                y0 = (y + poster_y) * zoom_1 + offset_y
                 if portrait:
-                    page_width = self.layout["output_pagesize"][0] * zoom_1
-                    page_height = self.layout["output_pagesize"][1] * zoom_1
-                    top = self.layout["border_top"] * zoom_1
-                    right = self.layout["border_right"] * zoom_1
-                    bottom = self.layout["border_bottom"] * zoom_1
-                    left = self.layout["border_left"] * zoom_1
+                    page_width = output_width * zoom_1
+                    page_height = output_height * zoom_1
+                    top = border_top * zoom_1
+                    right = border_right * zoom_1
+                    bottom = border_bottom * zoom_1
+                    left = border_left * zoom_1
                 else:
                     # page is rotated 90 degrees clockwise
-                    page_width = self.layout["output_pagesize"][1] * zoom_1
-                    page_height = self.layout["output_pagesize"][0] * zoom_1
-                    top = self.layout["border_left"] * zoom_1
-                    right = self.layout["border_top"] * zoom_1
-                    bottom = self.layout["border_right"] * zoom_1
-                    left = self.layout["border_bottom"] * zoom_1
+                    page_width = output_height * zoom_1
+                    page_height = output_width * zoom_1
+                    top = border_left * zoom_1
+                    right = border_top * zoom_1
+                    bottom = border_right * zoom_1
+                    left = border_bottom * zoom_1
                 # inner rectangle
                 if hasattr(page, "new_shape"):
                     shape = page.new_shape()
@@ -753,164 +1053,51 @@ class Plakativ:
                 )
                 shape.commit()
 
-        for i, (x, y, portrait) in enumerate(self.layout["positions"]):
-            if portrait:
-                page_width = mm_to_pt(self.layout["output_pagesize"][0])
-                page_height = mm_to_pt(self.layout["output_pagesize"][1])
-            else:
-                page_width = mm_to_pt(self.layout["output_pagesize"][1])
-                page_height = mm_to_pt(self.layout["output_pagesize"][0])
-            # since pymupdf 1.19.0 a warning will be issued if the deprecated names are used
-            if hasattr(outdoc, "new_page"):
-                np = outdoc.new_page
-            else:
-                np = outdoc.newPage
-            page = np(
-                -1, width=page_width, height=page_height  # insert after last page
-            )
-
-            if portrait:
-                target_x = x - self.layout["border_left"]
-                target_y = y - self.layout["border_top"]
-                target_width = self.layout["output_pagesize"][0]
-                target_height = self.layout["output_pagesize"][1]
-            else:
-                target_x = x - self.layout["border_bottom"]
-                target_y = y - self.layout["border_left"]
-                target_width = self.layout["output_pagesize"][1]
-                target_height = self.layout["output_pagesize"][0]
-            target_xoffset = 0
-            target_yoffset = 0
-            if target_x < 0:
-                target_xoffset = -target_x
-                target_width += target_x
-                target_x = 0
-            if target_y < 0:
-                target_yoffset = -target_y
-                target_height += target_y
-                target_y = 0
-            if target_x + target_width > self.layout["postersize"][0]:
-                target_width = self.layout["postersize"][0] - target_x
-            if target_y + target_height > self.layout["postersize"][1]:
-                target_height = self.layout["postersize"][1] - target_y
-
-            targetrect = fitz.Rect(
-                mm_to_pt(target_xoffset),
-                mm_to_pt(target_yoffset),
-                mm_to_pt(target_xoffset + target_width),
-                mm_to_pt(target_yoffset + target_height),
-            )
-
-            factor = inpage_width / self.layout["postersize"][0]
-            sourcerect = fitz.Rect(
-                mm_to_pt(factor * target_x),
-                mm_to_pt(factor * target_y),
-                mm_to_pt(factor * (target_x + target_width)),
-                mm_to_pt(factor * (target_y + target_height)),
+        positions = list(enumerate(self.layout["positions"]))
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+        # starting more processes than there are pages to render is wasteful
+        jobs = min(jobs, len(positions))
+        if jobs <= 1 or len(positions) <= 2:
+            _render_pages(
+                outdoc,
+                self.doc,
+                self.pagenr,
+                self.layout,
+                inpage_width,
+                positions,
+                guides,
+                numbers,
+                border,
             )
-
+        else:
+            indoc = fitz.open()
             # since pymupdf 1.19.0 a warning will be issued if the deprecated names are used
-            if hasattr(page, "show_pdf_page"):
-                spp = page.show_pdf_page
-            else:
-                spp = page.showPDFpage
-            spp(
-                targetrect,  # fill the whole page
-                self.doc,  # input document
-                self.pagenr,  # input page number
-                clip=sourcerect,  # part of the input page to use
-            )
-
-            if hasattr(page, "new_shape"):
-                shape = page.new_shape()
+            if hasattr(indoc, "insert_pdf"):
+                indoc.insert_pdf(self.doc, from_page=self.pagenr, to_page=self.pagenr)
+                ipdf = outdoc.insert_pdf
             else:
-                shape = page.newShape()
-            if hasattr(shape, "draw_rect"):
-                dr = shape.draw_rect
-            else:
-                dr = shape.drawRect
-            if guides:
-                if portrait:
-                    dr(
-                        fitz.Rect(
-                            mm_to_pt(self.layout["border_left"]),
-                            mm_to_pt(self.layout["border_top"]),
-                            page_width - mm_to_pt(self.layout["border_right"]),
-                            page_height - mm_to_pt(self.layout["border_bottom"]),
-                        )
-                    )
-                else:
-                    dr(
-                        fitz.Rect(
-                            mm_to_pt(self.layout["border_bottom"]),
-                            mm_to_pt(self.layout["border_left"]),
-                            page_width - mm_to_pt(self.layout["border_top"]),
-                            page_height - mm_to_pt(self.layout["border_right"]),
-                        )
-                    )
-                shape.finish(width=0.2, color=(0.5, 0.5, 0.5), dashes="[5 6 1 6] 0")
-            if numbers:
-                if portrait:
-                    shape.insertTextbox(
-                        fitz.Rect(
-                            mm_to_pt(self.layout["border_left"]) + 5,
-                            mm_to_pt(self.layout["border_top"]) + 5,
-                            page_width - mm_to_pt(self.layout["border_right"]) - 5,
-                            page_height - mm_to_pt(self.layout["border_bottom"]) - 5,
-                        ),
-                        "%d" % (i + 1),
-                        fontsize=8,
-                        color=(0.5, 0.5, 0.5),
-                    )
-                else:
-                    shape.insertTextbox(
-                        fitz.Rect(
-                            mm_to_pt(self.layout["border_bottom"]) + 5,
-                            mm_to_pt(self.layout["border_left"]) + 5,
-                            page_width - mm_to_pt(self.layout["border_top"]) - 5,
-                            page_height - mm_to_pt(self.layout["border_right"]) - 5,
-                        ),
-                        "%d" % (i + 1),
-                        fontsize=8,
-                        color=(0.5, 0.5, 0.5),
-                    )
-            if border:
-                if portrait:
-                    dr(
-                        fitz.Rect(
-                            mm_to_pt(self.layout["border_left"] - x),
-                            mm_to_pt(self.layout["border_top"] - y),
-                            mm_to_pt(
-                                self.layout["border_left"]
-                                - x
-                                + self.layout["postersize"][0]
-                            ),
-                            mm_to_pt(
-                                self.layout["border_top"]
-                                - y
-                                + self.layout["postersize"][1]
-                            ),
-                        )
-                    )
-                else:
-                    dr(
-                        fitz.Rect(
-                            mm_to_pt(self.layout["border_bottom"] - x),
-                            mm_to_pt(self.layout["border_left"] - y),
-                            mm_to_pt(
-                                self.layout["border_bottom"]
-                                - x
-                                + self.layout["postersize"][0]
-                            ),
-                            mm_to_pt(
-                                self.layout["border_left"]
-                                - y
-                                + self.layout["postersize"][1]
-                            ),
-                        )
-                    )
-                shape.finish(width=0.2, color=(0.5, 0.5, 0.5), dashes="[1 1] 0")
-            shape.commit()
+                indoc.insertPDF(self.doc, from_page=self.pagenr, to_page=self.pagenr)
+                ipdf = outdoc.insertPDF
+            indata = indoc.write()
+            # every worker renders a consecutive range of pages so that the
+            # results can be appended in order
+            chunksize = math.ceil(len(positions) / jobs)
+            tasks = [
+                (
+                    indata,
+                    self.layout,
+                    inpage_width,
+                    positions[k : k + chunksize],
+                    guides,
+                    numbers,
+                    border,
+                )
+                for k in range(0, len(positions), chunksize)
+            ]
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                for data in executor.map(_render_pages_worker, tasks):
+                    ipdf(fitz.open(stream=data, filetype="application/pdf"))
 
         if hasattr(outfile, "write"):
             # outfile is an object with a write() method
@@ -920,6 +1107,164 @@ class Plakativ:
             outdoc.save(outfile, garbage=4, deflate=True)
 
 
+# Append the poster pages at the given (index, position) pairs of the layout to
+# outdoc. This is called by Plakativ.render() directly or, when rendering in
+# parallel, by _render_pages_worker() in another process.
+def _render_pages(
+    outdoc, indoc, pagenr, layout, inpage_width, positions, guides, numbers, border
+):
+    # the following values are the same for every page, so look them up
+    # and convert them to pt only once instead of in the loop below
+    output_width, output_height = layout["output_pagesize"]
+    poster_width, poster_height = layout["postersize"]
+    border_top = layout["border_top"]
+    border_right = layout["border_right"]
+    border_bottom = layout["border_bottom"]
+    border_left = layout["border_left"]
+    output_width_pt = mm_to_pt(output_width)
+    output_height_pt = mm_to_pt(output_height)
+    border_top_pt = mm_to_pt(border_top)
+    border_right_pt = mm_to_pt(border_right)
+    border_bottom_pt = mm_to_pt(border_bottom)
+    border_left_pt = mm_to_pt(border_left)
+    # factor to convert from poster dimensions (given in mm) into input page
+    # dimensions (given in pt)
+    factor = inpage_width / poster_width * MM_TO_PT
+    # since pymupdf 1.19.0 a warning will be issued if the deprecated names are used
+    if hasattr(outdoc, "new_page"):
+        np = outdoc.new_page
+    else:
+        np = outdoc.newPage
+
+    for i, (x, y, portrait) in positions:
+        if portrait:
+            page_width = output_width_pt
+            page_height = output_height_pt
+        else:
+            page_width = output_height_pt
+            page_height = output_width_pt
+        page = np(-1, width=page_width, height=page_height)  # insert after last page
+
+        if portrait:
+            target_x = x - border_left
+            target_y = y - border_top
+            target_width = output_width
+            target_height = output_height
+        else:
+            target_x = x - border_bottom
+            target_y = y - border_left
+            target_width = output_height
+            target_height = output_width
+        target_xoffset = 0
+        target_yoffset = 0
+        if target_x < 0:
+            target_xoffset = -target_x
+            target_width += target_x
+            target_x = 0
+        if target_y < 0:
+            target_yoffset = -target_y
+            target_height += target_y
+            target_y = 0
+        if target_x + target_width > poster_width:
+            target_width = poster_width - target_x
+        if target_y + target_height > poster_height:
+            target_height = poster_height - target_y
+
+        targetrect = fitz.Rect(
+            target_xoffset * MM_TO_PT,
+            target_yoffset * MM_TO_PT,
+            (target_xoffset + target_width) * MM_TO_PT,
+            (target_yoffset + target_height) * MM_TO_PT,
+        )
+
+        sourcerect = fitz.Rect(
+            factor * target_x,
+            factor * target_y,
+            factor * (target_x + target_width),
+            factor * (target_y + target_height),
+        )
+
+        # since pymupdf 1.19.0 a warning will be issued if the deprecated names are used
+        if hasattr(page, "show_pdf_page"):
+            spp = page.show_pdf_page
+        else:
+            spp = page.showPDFpage
+        spp(
+            targetrect,  # fill the whole page
+            indoc,  # input document
+            pagenr,  # input page number
+            clip=sourcerect,  # part of the input page to use
+        )
+
+        if hasattr(page, "new_shape"):
+            shape = page.new_shape()
+        else:
+            shape = page.newShape()
+        if hasattr(shape, "draw_rect"):
+            dr = shape.draw_rect
+        else:
+            dr = shape.drawRect
+        if portrait:
+            guide_rect = (
+                border_left_pt,
+                border_top_pt,
+                page_width - border_right_pt,
+                page_height - border_bottom_pt,
+            )
+        else:
+            guide_rect = (
+                border_bottom_pt,
+                border_left_pt,
+                page_width - border_top_pt,
+                page_height - border_right_pt,
+            )
+        if guides:
+            dr(fitz.Rect(*guide_rect))
+            shape.finish(width=0.2, color=(0.5, 0.5, 0.5), dashes="[5 6 1 6] 0")
+        if numbers:
+            shape.insertTextbox(
+                fitz.Rect(
+                    guide_rect[0] + 5,
+                    guide_rect[1] + 5,
+                    guide_rect[2] - 5,
+                    guide_rect[3] - 5,
+                ),
+                "%d" % (i + 1),
+                fontsize=8,
+                color=(0.5, 0.5, 0.5),
+            )
+        if border:
+            if portrait:
+                border_x = border_left - x
+                border_y = border_top - y
+            else:
+                border_x = border_bottom - x
+                border_y = border_left - y
+            dr(
+                fitz.Rect(
+                    border_x * MM_TO_PT,
+                    border_y * MM_TO_PT,
+                    (border_x + poster_width) * MM_TO_PT,
+                    (border_y + poster_height) * MM_TO_PT,
+                )
+            )
+            shape.finish(width=0.2, color=(0.5, 0.5, 0.5), dashes="[1 1] 0")
+        shape.commit()
+
+
+# MuPDF documents cannot be passed to other processes, so the worker gets the
+# input page as a serialized PDF document of its own and returns the pages it
+# rendered as a serialized PDF document as well.
+def _render_pages_worker(args):
+    indata, layout, inpage_width, positions, guides, numbers, border = args
+    indoc = fitz.open(stream=indata, filetype="application/pdf")
+    outdoc = fitz.open()
+    _render_pages(
+        outdoc, indoc, 0, layout, inpage_width, positions, guides, numbers, border
+    )
+    return outdoc.write()
+
+
 # from Python 3.7 Lib/idlelib/configdialog.py
 # Copyright 2015-2017 Terry Jan Reedy
 # Python License
@@ -1032,6 +1377,47 @@ class OptionMenu(tkinter.Menubutton):
         self.__menu = None
 
 
+class VariablesFrame(tkinter.LabelFrame):
+    """LabelFrame whose tkinter variables can be written in bulk.
+
+    Subclasses trace their variables with _on_variable() and write them back
+    from set(). Wrapping these writes in _batch_updates() keeps the tracers
+    from re-entering set() once for every variable that is written. Writes
+    from the user are collected and handed to the on_<name>() methods of the
+    subclass once Tk is idle, so that each variable is handled only once even
+    if it was written several times in a row."""
+
+    _updating = False
+    _dirty = None
+
+    @contextmanager
+    def _batch_updates(self):
+        self._updating = True
+        try:
+            yield
+        finally:
+            self._updating = False
+
+    def _on_variable(self, name):
+        if self._updating:
+            return
+        if self._dirty is None:
+            self._dirty = []
+            self.after_idle(self._flush_variables)
+        if name not in self._dirty:
+            self._dirty.append(name)
+
+    def _flush_variables(self):
+        dirty, self._dirty = self._dirty, None
+        for name in dirty:
+            try:
+                value = self.variables[name].get()
+            except tkinter.TclError:
+                # the user is still typing
+                continue
+            getattr(self, "on_" + name)(value)
+
+
 class Application(tkinter.Frame):
     def __init__(self, master=None):
         super().__init__(master)
@@ -1044,6 +1430,26 @@ class Application(tkinter.Frame):
         self.canvas.pack(fill=tkinter.BOTH, side=tkinter.LEFT, expand=tkinter.TRUE)
         self.canvas_size = self.canvas.winfo_width(), self.canvas.winfo_height()
         self.canvas.bind("<Configure>", self.on_resize)
+        # Restoring a minimized window only maps the toplevel and not the
+        # canvas. Every widget has its toplevel among its binding tags, so this
+        # also catches the canvas being mapped.
+        self.winfo_toplevel().bind("<Map>", self.on_map, add="+")
+        self.redraw_pending = None
+        # whether a redraw was skipped because the canvas was not visible
+        self.redraw_skipped = False
+        # the preview image currently shown as a (key, PhotoImage) tuple and
+        # the last few preview images by their key
+        self.preview = None
+        self.previews = OrderedDict()
+        # ids of the canvas items showing the preview image and the inner and
+        # outer rectangle of each page, so that they can be moved instead of
+        # created again on every redraw
+        self.image_item = None
+        self.page_items = []
+        # id of the text shown instead of the preview while no file is open
+        self.placeholder_item = None
+        # the arguments and the result of the last call to compute_layout()
+        self.last_layout = None
 
         frame_right = tkinter.Frame(self)
         frame_right.pack(side=tkinter.TOP, expand=tkinter.TRUE, fill=tkinter.Y)
@@ -1140,12 +1546,10 @@ class Application(tkinter.Frame):
         mode, (custom_size, size), mult, npages = self.postersize.value
         bordersize = self.bordersize.value
         strategy = self.layouter.value
-        self.plakativ.set_input_pagenr(pagenum - 1)
-        size, mult, npages = self.plakativ.compute_layout(
-            mode, size, mult, npages, pagesize, bordersize, strategy
+        size, mult, npages = self.compute_layout(
+            pagenum, mode, size, mult, npages, pagesize, bordersize, strategy
         )
         self.postersize.set(mode, (custom_size, size), mult, npages)
-        self.draw()
         width, height = self.plakativ.get_input_page_size()
         return "%.02f" % pt_to_mm(width), "%.02f" % pt_to_mm(height)
 
@@ -1155,24 +1559,20 @@ class Application(tkinter.Frame):
         mode, (custom_size, size), mult, npages = self.postersize.value
         bordersize = self.bordersize.value
         strategy = self.layouter.value
-        self.plakativ.set_input_pagenr(pagenum - 1)
-        size, mult, npages = self.plakativ.compute_layout(
-            mode, size, mult, npages, pagesize, bordersize, strategy
+        size, mult, npages = self.compute_layout(
+            pagenum, mode, size, mult, npages, pagesize, bordersize, strategy
         )
         self.postersize.set(mode, (custom_size, size), mult, npages)
-        self.draw()
 
     def on_bordersize(self, value):
         _, pagesize = self.pagesize.value
         pagenum, _ = self.input.value
         mode, (custom_size, size), mult, npages = self.postersize.value
         strategy = self.layouter.value
-        self.plakativ.set_input_pagenr(pagenum - 1)
-        size, mult, npages = self.plakativ.compute_layout(
-            mode, size, mult, npages, pagesize, value, strategy
+        size, mult, npages = self.compute_layout(
+            pagenum, mode, size, mult, npages, pagesize, value, strategy
         )
         self.postersize.set(mode, (custom_size, size), mult, npages)
-        self.draw()
 
     def on_postersize(self, value):
         mode, (custom_size, size), mult, npages = value
@@ -1180,11 +1580,9 @@ class Application(tkinter.Frame):
         _, pagesize = self.pagesize.value
         border = self.bordersize.value
         strategy = self.layouter.value
-        self.plakativ.set_input_pagenr(pagenum - 1)
-        size, mult, npages = self.plakativ.compute_layout(
-            mode, size, mult, npages, pagesize, border, strategy
+        size, mult, npages = self.compute_layout(
+            pagenum, mode, size, mult, npages, pagesize, border, strategy
         )
-        self.draw()
         return (mode, (custom_size, size), mult, npages)
 
     def on_layouter(self, value):
@@ -1192,73 +1590,157 @@ class Application(tkinter.Frame):
         pagenum, _ = self.input.value
         mode, (custom_size, size), mult, npages = self.postersize.value
         border = self.bordersize.value
-        self.plakativ.set_input_pagenr(pagenum - 1)
-        size, mult, npages = self.plakativ.compute_layout(
-            mode, size, mult, npages, pagesize, border, value
+        size, mult, npages = self.compute_layout(
+            pagenum, mode, size, mult, npages, pagesize, border, value
         )
         self.postersize.set(mode, (custom_size, size), mult, npages)
+
+    # Compute the layout for the input page number pagenum and redraw the
+    # preview. Setting the value of one widget often makes another widget
+    # report its unchanged value again, so if none of the arguments changed
+    # since the last call, the layout is neither computed nor drawn again.
+    def compute_layout(
+        self, pagenum, mode, size, mult, npages, pagesize, border, strategy
+    ):
+        key = (pagenum, mode, size, mult, npages, pagesize, border, strategy)
+        if self.last_layout is not None and self.last_layout[0] == key:
+            return self.last_layout[1]
+        self.plakativ.set_input_pagenr(pagenum - 1)
+        result = self.plakativ.compute_layout(
+            mode, size, mult, npages, pagesize, border, strategy
+        )
+        self.last_layout = (key, result)
         self.draw()
+        return result
 
     def on_resize(self, event):
+        if (event.width, event.height) == self.canvas_size:
+            return
         self.canvas_size = (event.width, event.height)
+        # While the window is resized, a Configure event arrives for every
+        # step, so instead of redrawing for each of them, at most one redraw
+        # every 50 ms is done with the canvas size at that time.
+        if self.redraw_pending is None:
+            self.redraw_pending = self.after(50, self.on_redraw)
+
+    def on_redraw(self):
+        self.redraw_pending = None
         self.draw()
 
-    def draw(self):
-        # clean canvas
-        self.canvas.delete(tkinter.ALL)
+    def on_map(self, event):
+        if self.redraw_skipped:
+            self.draw()
 
+    def draw(self):
         if not hasattr(self, "plakativ"):
-            button_text = "Open PDF"
-            if have_img2pdf:
-                button_text = "Open PDF, JPG, PNG, TIF"
-            self.canvas.create_text(
-                self.canvas_size[0] / 2,
-                self.canvas_size[1] / 2,
-                text='Click on the "%s" button in the upper right.' % button_text,
-                fill="white",
-            )
+            # the text is only moved on resize instead of being created again
+            if self.placeholder_item is None:
+                button_text = "Open PDF"
+                if have_img2pdf:
+                    button_text = "Open PDF, JPG, PNG, TIF"
+                self.placeholder_item = self.canvas.create_text(
+                    self.canvas_size[0] / 2,
+                    self.canvas_size[1] / 2,
+                    text='Click on the "%s" button in the upper right.' % button_text,
+                    fill="white",
+                )
+            else:
+                self.canvas.coords(
+                    self.placeholder_item,
+                    self.canvas_size[0] / 2,
+                    self.canvas_size[1] / 2,
+                )
             return
 
+        if self.placeholder_item is not None:
+            self.canvas.delete(self.placeholder_item)
+            self.placeholder_item = None
+
+        # nothing can be seen while the window is minimized or the canvas is
+        # tiny, so rendering the preview is postponed until it is mapped again
+        # or resized
+        if (
+            self.canvas_size[0] < 10
+            or self.canvas_size[1] < 10
+            or not self.canvas.winfo_viewable()
+        ):
+            self.redraw_skipped = True
+            return
+        self.redraw_skipped = False
+
         canvas_padding = 10
 
-        width, height = self.plakativ.get_input_page_size()
+        # the values from the layout are the same for every page, so they are
+        # looked up only once
+        layout = self.plakativ.layout
+        positions = layout["positions"]
+        poster_width, poster_height = layout["postersize"]
+        overall_width, overall_height = layout["overallsize"]
+        poster_x, poster_y = layout["posterpos"]
+        output_width, output_height = layout["output_pagesize"]
+        canvas_width, canvas_height = self.canvas_size
 
-        # factor to convert from input page dimensions (given in pt) into
-        # canvas dimensions (given in pixels)
-        zoom_0 = min(
-            self.canvas_size[0]
-            / width
-            * self.plakativ.layout["postersize"][0]
-            / (self.plakativ.layout["overallsize"][0] + canvas_padding),
-            self.canvas_size[1]
-            / height
-            * self.plakativ.layout["postersize"][1]
-            / (self.plakativ.layout["overallsize"][1] + canvas_padding),
-        )
-
-        img = self.plakativ.get_image(zoom_0)
-        tkimg = tkinter.PhotoImage(data=img)
+        width, height = self.plakativ.get_input_page_size()
 
         # factor to convert from output poster dimensions (given in mm) into
         # canvas dimensions (given in pixels)
         zoom_1 = min(
-            self.canvas_size[0]
-            / (self.plakativ.layout["overallsize"][0] + canvas_padding),
-            self.canvas_size[1]
-            / (self.plakativ.layout["overallsize"][1] + canvas_padding),
+            canvas_width / (overall_width + canvas_padding),
+            canvas_height / (overall_height + canvas_padding),
         )
 
+        # factor to convert from input page dimensions (given in pt) into
+        # canvas dimensions (given in pixels) such that the image has exactly
+        # the size of the poster on the canvas
+        zoom_0 = zoom_1 * poster_width / width
+
+        # The last preview image is reused as long as neither the input page
+        # nor the (rounded) zoom factor change. That is the case whenever only
+        # the layout changes. Switching back and forth between layouters or
+        # input pages changes the zoom factor, so the last few images are kept
+        # as well.
+        key = (self.plakativ.pagenr, round(zoom_0, 4))
+        if self.preview is None or self.preview[0] != key:
+            if key in self.previews:
+                self.previews.move_to_end(key)
+            else:
+                self.add_preview(key, self.plakativ.get_image(zoom_0))
+            self.preview = (key, self.previews[key])
+        tkimg = self.preview[1]
+
+        # offset that centers the overall size on the canvas
+        offset_x = (canvas_width - zoom_1 * overall_width) / 2
+        offset_y = (canvas_height - zoom_1 * overall_height) / 2
+
         # draw image on canvas
-        self.canvas.create_image(
-            (self.canvas_size[0] - zoom_1 * self.plakativ.layout["overallsize"][0]) / 2
-            + zoom_1 * self.plakativ.layout["posterpos"][0],
-            (self.canvas_size[1] - zoom_1 * self.plakativ.layout["overallsize"][1]) / 2
-            + zoom_1 * self.plakativ.layout["posterpos"][1],
-            anchor=tkinter.NW,
-            image=tkimg,
-        )
+        image_pos = (offset_x + zoom_1 * poster_x, offset_y + zoom_1 * poster_y)
+        if self.image_item is None:
+            # clean canvas
+            self.canvas.delete(tkinter.ALL)
+            self.image_item = self.canvas.create_image(
+                *image_pos, anchor=tkinter.NW, image=tkimg
+            )
+        else:
+            self.canvas.coords(self.image_item, *image_pos)
+            if self.canvas.image is not tkimg:
+                self.canvas.itemconfigure(self.image_item, image=tkimg)
         self.canvas.image = tkimg
 
+        # Every call into Tcl has its overhead, so instead of a call per
+        # rectangle, all rectangles are created or moved by a single script.
+        canvas = str(self.canvas)
+
+        # only create the rectangles again if the number of pages changed
+        if len(self.page_items) != len(positions):
+            self.canvas.delete(*[item for items in self.page_items for item in items])
+            script = " ".join(
+                "[%s create rectangle 0 0 0 0 -outline blue]"
+                " [%s create rectangle 0 0 0 0 -outline red]" % (canvas, canvas)
+                for _ in positions
+            )
+            item_ids = self.canvas.tk.splitlist(self.canvas.tk.eval("list " + script))
+            self.page_items = list(zip(item_ids[0::2], item_ids[1::2]))
+
         # self.canvas.create_text(
         #    self.canvas_size[0] / 2,
         #    self.canvas_size[1] / 2,
@@ -1268,51 +1750,87 @@ class Application(tkinter.Frame):
         #    anchor=tkinter.CENTER,
         # )
 
+        # page width and height, the top and left border and the width and
+        # height inside the borders on the canvas for pages in portrait
+        # orientation and for pages that are rotated 90 degrees clockwise
+        border_top = layout["border_top"] * zoom_1
+        border_right = layout["border_right"] * zoom_1
+        border_bottom = layout["border_bottom"] * zoom_1
+        border_left = layout["border_left"] * zoom_1
+        page_width = output_width * zoom_1
+        page_height = output_height * zoom_1
+        page_portrait = (
+            page_width,
+            page_height,
+            border_top,
+            border_left,
+            page_width - border_left - border_right,
+            page_height - border_top - border_bottom,
+        )
+        page_landscape = (
+            page_height,
+            page_width,
+            border_left,
+            border_bottom,
+            page_height - border_bottom - border_top,
+            page_width - border_left - border_right,
+        )
+
         # draw rectangles
         # TODO: also draw numbers indicating the page number
-        for x, y, portrait in self.plakativ.layout["positions"]:
-            x0 = (x + self.plakativ.layout["posterpos"][0]) * zoom_1 + (
-                self.canvas_size[0] - zoom_1 * self.plakativ.layout["overallsize"][0]
-            ) / 2
-            y0 = (y + self.plakativ.layout["posterpos"][1]) * zoom_1 + (
-                self.canvas_size[1] - zoom_1 * self.plakativ.layout["overallsize"][1]
-            ) / 2
+        # the pages are split by orientation first so that the sizes only have
+        # to be unpacked once per orientation and not once per page
+        portrait_pages = []
+        landscape_pages = []
+        for (x, y, portrait), items in zip(positions, self.page_items):
             if portrait:
-                page_width = self.plakativ.layout["output_pagesize"][0] * zoom_1
-                page_height = self.plakativ.layout["output_pagesize"][1] * zoom_1
-                top = self.plakativ.layout["border_top"] * zoom_1
-                right = self.plakativ.layout["border_right"] * zoom_1
-                bottom = self.plakativ.layout["border_bottom"] * zoom_1
-                left = self.plakativ.layout["border_left"] * zoom_1
+                portrait_pages.append((x, y, items))
             else:
-                # page is rotated 90 degrees clockwise
-                page_width = self.plakativ.layout["output_pagesize"][1] * zoom_1
-                page_height = self.plakativ.layout["output_pagesize"][0] * zoom_1
-                top = self.plakativ.layout["border_left"] * zoom_1
-                right = self.plakativ.layout["border_top"] * zoom_1
-                bottom = self.plakativ.layout["border_right"] * zoom_1
-                left = self.plakativ.layout["border_bottom"] * zoom_1
-            # inner rectangle
-            self.canvas.create_rectangle(
-                x0,
-                y0,
-                x0 + page_width - left - right,
-                y0 + page_height - top - bottom,
-                outline="blue",
-            )
-            # outer rectangle
-            self.canvas.create_rectangle(
-                x0 - left,
-                y0 - top,
-                x0 - left + page_width,
-                y0 - top + page_height,
-                outline="red",
-            )
+                landscape_pages.append((x, y, items))
+        script = []
+        for pages, (page_width, page_height, top, left, inner_width, inner_height) in (
+            (portrait_pages, page_portrait),
+            (landscape_pages, page_landscape),
+        ):
+            for x, y, (inner, outer) in pages:
+                x0 = (x + poster_x) * zoom_1 + offset_x
+                y0 = (y + poster_y) * zoom_1 + offset_y
+                # inner rectangle
+                script.append(
+                    "%s coords %s %r %r %r %r"
+                    % (canvas, inner, x0, y0, x0 + inner_width, y0 + inner_height)
+                )
+                # outer rectangle
+                script.append(
+                    "%s coords %s %r %r %r %r"
+                    % (
+                        canvas,
+                        outer,
+                        x0 - left,
+                        y0 - top,
+                        x0 - left + page_width,
+                        y0 - top + page_height,
+                    )
+                )
+        self.canvas.tk.eval("\n".join(script))
 
         # filename = "out_%03d.ps" % len(self.plakativ.layout["positions"])
         # self.canvas.postscript(file=filename)
         # print("saved ", filename)
 
+    # Loading the image into a PhotoImage decodes it, which is fast for the
+    # uncompressed data from get_image(). Once four images are kept, the least
+    # recently used PhotoImage is loaded with the new image instead of
+    # creating another one. The image shown on the canvas was moved to the end
+    # when it was selected, so it is never the one that gets reused.
+    def add_preview(self, key, img):
+        if len(self.previews) >= 4:
+            _, tkimg = self.previews.popitem(last=False)
+            tkimg.configure(data=img)
+            self.previews[key] = tkimg
+        else:
+            self.previews[key] = tkinter.PhotoImage(data=img)
+
     def on_open_button(self):
         if have_img2pdf:
             filetypes = [
@@ -1346,6 +1864,8 @@ class Application(tkinter.Frame):
         if have_img2pdf:
             # if we have img2pdf available we can encapsulate a raster image
             # into a PDF container
+            # unlike on the command line, the warnings of img2pdf are not
+            # silenced, so that they show up on standard error
             data = None
             try:
                 data = img2pdf.convert(self.filename)
@@ -1380,6 +1900,9 @@ class Application(tkinter.Frame):
             # failed
             doc = fitz.open(filename=self.filename)
         self.plakativ = Plakativ(doc)
+        self.preview = None
+        self.previews.clear()
+        self.last_layout = None
         # compute the splitting with the current values
         mode, (custom_size, size), mult, npages = self.postersize.value
         _, pagesize = self.pagesize.value
@@ -1391,10 +1914,8 @@ class Application(tkinter.Frame):
         # update input widget
         width, height = self.plakativ.get_input_page_size()
         self.input.set(1, ("%.02f" % pt_to_mm(width), "%.02f" % pt_to_mm(height)))
-        self.input.nametowidget("spinbox_pagenum").configure(
-            to=self.plakativ.get_input_pagenums()
-        )
-        self.input.nametowidget("label_of_pagenum").configure(
+        self.input.spinbox_pagenum.configure(to=self.plakativ.get_input_pagenums())
+        self.input.label_of_pagenum.configure(
             text="of %d" % self.plakativ.get_input_pagenums()
         )
         # update postersize widget
@@ -1436,6 +1957,7 @@ class LayouterWidget(tkinter.LabelFrame):
         tkinter.LabelFrame.__init__(self, parent, text="Layouter", *args, **kw)
 
         self.callback = None
+        self.value = None
 
         self.variables = {"strategy": tkinter.StringVar()}
 
@@ -1455,7 +1977,7 @@ class LayouterWidget(tkinter.LabelFrame):
         layouter3.pack(anchor=tkinter.W)
 
     def on_strategy(self, value):
-        if getattr(self, "value", None) is None:
+        if self.value is None:
             return
         strategy = self.value
         self.set(value)
@@ -1465,7 +1987,7 @@ class LayouterWidget(tkinter.LabelFrame):
         # from before or otherwise we do not need to execute the callback in
         # the end
         state_changed = True
-        if getattr(self, "value", None) is not None:
+        if self.value is not None:
             state_changed = self.value != strategy
         # execute callback if necessary
         if state_changed and self.callback is not None:
@@ -1500,11 +2022,12 @@ class OutOptsWidget(tkinter.LabelFrame):
         ).pack(anchor=tkinter.W)
 
 
-class InputWidget(tkinter.LabelFrame):
+class InputWidget(VariablesFrame):
     def __init__(self, parent, *args, **kw):
         tkinter.LabelFrame.__init__(self, parent, text="Input properties", *args, **kw)
 
         self.callback = None
+        self.value = None
 
         self.variables = {
             "pagenum": tkinter.IntVar(),
@@ -1514,12 +2037,12 @@ class InputWidget(tkinter.LabelFrame):
 
         def callback(varname, idx, op):
             assert op == "w"
-            self.on_pagenum(self.variables["pagenum"].get())
+            self._on_variable("pagenum")
 
         self.variables["pagenum"].trace("w", callback)
 
         tkinter.Label(self, text="Use page").grid(row=0, column=0, sticky=tkinter.W)
-        tkinter.Spinbox(
+        self.spinbox_pagenum = tkinter.Spinbox(
             self,
             increment=1,
             from_=1,
@@ -1527,10 +2050,12 @@ class InputWidget(tkinter.LabelFrame):
             width=3,
             name="spinbox_pagenum",
             textvariable=self.variables["pagenum"],
-        ).grid(row=0, column=1, sticky=tkinter.W)
-        tkinter.Label(self, text="of 1", name="label_of_pagenum").grid(
-            row=0, column=2, sticky=tkinter.W
         )
+        self.spinbox_pagenum.grid(row=0, column=1, sticky=tkinter.W)
+        self.label_of_pagenum = tkinter.Label(
+            self, text="of 1", name="label_of_pagenum"
+        )
+        self.label_of_pagenum.grid(row=0, column=2, sticky=tkinter.W)
         tkinter.Label(self, text="Width:").grid(row=1, column=0, sticky=tkinter.W)
         tkinter.Label(self, textvariable=self.variables["width"]).grid(
             row=1, column=1, sticky=tkinter.W
@@ -1547,7 +2072,7 @@ class InputWidget(tkinter.LabelFrame):
         )
 
     def on_pagenum(self, value):
-        if getattr(self, "value", None) is None:
+        if self.value is None:
             return
         _, size = self.value
         self.set(value, size)
@@ -1557,28 +2082,30 @@ class InputWidget(tkinter.LabelFrame):
         # from before or otherwise we do not need to execute the callback in
         # the end
         state_changed = True
-        if getattr(self, "value", None) is not None:
+        if self.value is not None:
             state_changed = self.value != (pagenum, pagesize)
         # execute callback if necessary
         if state_changed and self.callback is not None:
             pagesize = self.callback((pagenum, pagesize))
         self.value = (pagenum, pagesize)
         width, height = pagesize
-        if self.variables["pagenum"].get() != pagenum:
-            self.variables["pagenum"].set(pagenum)
-        if self.variables["width"].get() != width:
-            self.variables["width"].set(width)
-        if self.variables["height"].get() != height:
-            self.variables["height"].set(height)
+        with self._batch_updates():
+            if self.variables["pagenum"].get() != pagenum:
+                self.variables["pagenum"].set(pagenum)
+            if self.variables["width"].get() != width:
+                self.variables["width"].set(width)
+            if self.variables["height"].get() != height:
+                self.variables["height"].set(height)
 
 
-class PageSizeWidget(tkinter.LabelFrame):
+class PageSizeWidget(VariablesFrame):
     def __init__(self, parent, *args, **kw):
         tkinter.LabelFrame.__init__(
             self, parent, text="Size of output pages", *args, **kw
         )
 
         self.callback = None
+        self.value = None
 
         self.variables = {
             "dropdown": tkinter.StringVar(),
@@ -1587,11 +2114,11 @@ class PageSizeWidget(tkinter.LabelFrame):
         }
 
         for k, v in self.variables.items():
-            # need to pass k and v as function arguments so that their value
-            # does not get overwritten each loop iteration
-            def callback(varname, idx, op, k_copy=k, v_copy=v):
+            # need to pass k as function argument so that its value does not
+            # get overwritten each loop iteration
+            def callback(varname, idx, op, k_copy=k):
                 assert op == "w"
-                getattr(self, "on_" + k_copy)(v_copy.get())
+                self._on_variable(k_copy)
 
             v.trace("w", callback)
 
@@ -1599,10 +2126,11 @@ class PageSizeWidget(tkinter.LabelFrame):
             row=1, column=0, columnspan=3, sticky=tkinter.W
         )
 
-        tkinter.Label(
+        size_label_width = tkinter.Label(
             self, text="Width:", state=tkinter.DISABLED, name="size_label_width"
-        ).grid(row=2, column=0, sticky=tkinter.W)
-        tkinter.Spinbox(
+        )
+        size_label_width.grid(row=2, column=0, sticky=tkinter.W)
+        spinbox_width = tkinter.Spinbox(
             self,
             format="%.2f",
             increment=0.01,
@@ -1612,15 +2140,18 @@ class PageSizeWidget(tkinter.LabelFrame):
             state=tkinter.DISABLED,
             name="spinbox_width",
             textvariable=self.variables["width"],
-        ).grid(row=2, column=1, sticky=tkinter.W)
-        tkinter.Label(
+        )
+        spinbox_width.grid(row=2, column=1, sticky=tkinter.W)
+        size_label_width_mm = tkinter.Label(
             self, text="mm", state=tkinter.DISABLED, name="size_label_width_mm"
-        ).grid(row=2, column=2, sticky=tkinter.W)
+        )
+        size_label_width_mm.grid(row=2, column=2, sticky=tkinter.W)
 
-        tkinter.Label(
+        size_label_height = tkinter.Label(
             self, text="Height:", state=tkinter.DISABLED, name="size_label_height"
-        ).grid(row=3, column=0, sticky=tkinter.W)
-        tkinter.Spinbox(
+        )
+        size_label_height.grid(row=3, column=0, sticky=tkinter.W)
+        spinbox_height = tkinter.Spinbox(
             self,
             format="%.2f",
             increment=0.01,
@@ -1630,10 +2161,23 @@ class PageSizeWidget(tkinter.LabelFrame):
             state=tkinter.DISABLED,
             name="spinbox_height",
             textvariable=self.variables["height"],
-        ).grid(row=3, column=1, sticky=tkinter.W)
-        tkinter.Label(
+        )
+        spinbox_height.grid(row=3, column=1, sticky=tkinter.W)
+        size_label_height_mm = tkinter.Label(
             self, text="mm", state=tkinter.DISABLED, name="size_label_height_mm"
-        ).grid(row=3, column=2, sticky=tkinter.W)
+        )
+        size_label_height_mm.grid(row=3, column=2, sticky=tkinter.W)
+
+        # the widgets that are only enabled for custom page sizes, kept here so
+        # that set() does not have to look them up by name
+        self.custom_widgets = [
+            size_label_width,
+            spinbox_width,
+            size_label_width_mm,
+            size_label_height,
+            spinbox_height,
+            size_label_height_mm,
+        ]
 
     def on_dropdown(self, value):
         custom_size, size = self.value
@@ -1645,13 +2189,13 @@ class PageSizeWidget(tkinter.LabelFrame):
         self.set(custom_size, size)
 
     def on_width(self, value):
-        if getattr(self, "value", None) is None:
+        if self.value is None:
             return
         custom_size, (_, height) = self.value
         self.set(custom_size, (value, height))
 
     def on_height(self, value):
-        if getattr(self, "value", None) is None:
+        if self.value is None:
             return
         custom_size, (width, _) = self.value
         self.set(custom_size, (width, value))
@@ -1661,39 +2205,38 @@ class PageSizeWidget(tkinter.LabelFrame):
         # from before or otherwise we do not need to execute the callback in
         # the end
         state_changed = True
-        if getattr(self, "value", None) is not None:
-            state_changed = self.value != (custom_size, pagesize)
+        if self.value is not None:
+            state_changed = self.value[0] != custom_size or not lengths_near(
+                self.value[1], pagesize
+            )
+            if not state_changed:
+                # keep the size the layout was computed with
+                pagesize = self.value[1]
         # execute callback if necessary
         if state_changed and self.callback is not None:
             self.callback((custom_size, pagesize))
         self.value = (custom_size, pagesize)
         width, height = pagesize
-        if custom_size:
-            self.nametowidget("size_label_width").configure(state=tkinter.NORMAL)
-            self.nametowidget("spinbox_width").configure(state=tkinter.NORMAL)
-            self.nametowidget("size_label_width_mm").configure(state=tkinter.NORMAL)
-            self.nametowidget("size_label_height").configure(state=tkinter.NORMAL)
-            self.nametowidget("spinbox_height").configure(state=tkinter.NORMAL)
-            self.nametowidget("size_label_height_mm").configure(state=tkinter.NORMAL)
-        else:
-            self.nametowidget("size_label_width").configure(state=tkinter.DISABLED)
-            self.nametowidget("spinbox_width").configure(state=tkinter.DISABLED)
-            self.nametowidget("size_label_width_mm").configure(state=tkinter.DISABLED)
-            self.nametowidget("size_label_height").configure(state=tkinter.DISABLED)
-            self.nametowidget("spinbox_height").configure(state=tkinter.DISABLED)
-            self.nametowidget("size_label_height_mm").configure(state=tkinter.DISABLED)
-        # only set variables that changed to not trigger multiple variable tracers
-        if custom_size:
-            if self.variables["dropdown"].get() != "custom":
-                self.variables["dropdown"].set("custom")
-        else:
-            val = dict(zip(PAGE_SIZES.values(), PAGE_SIZES.keys()))[(width, height)]
-            if self.variables["dropdown"].get() != val:
-                self.variables["dropdown"].set(val)
-        if self.variables["width"].get() != width:
-            self.variables["width"].set(width)
-        if self.variables["height"].get() != height:
-            self.variables["height"].set(height)
+        state = tkinter.NORMAL if custom_size else tkinter.DISABLED
+        for widget in self.custom_widgets:
+            widget.configure(state=state)
+        # Only set variables that changed and keep the variable tracers quiet
+        # while doing so. This also happens if self.value did not change, so
+        # that text the user typed but that could not be parsed is replaced.
+        with self._batch_updates():
+            if custom_size:
+                if self.variables["dropdown"].get() != "custom":
+                    self.variables["dropdown"].set("custom")
+            else:
+                val = PAGE_SIZES_REVERSE.get((width, height), "custom")
+                if self.variables["dropdown"].get() != val:
+                    self.variables["dropdown"].set(val)
+            if not lengths_near(
+                (self.variables["width"].get(), self.variables["height"].get()),
+                (width, height),
+            ):
+                self.variables["width"].set(width)
+                self.variables["height"].set(height)
 
 
 class BorderSizeWidget(tkinter.LabelFrame):
@@ -1703,8 +2246,12 @@ class BorderSizeWidget(tkinter.LabelFrame):
         )
 
         self.callback = None
+        self.value = None
 
-        self.variables = dict()
+        # the border values are kept on the Python side in self.value instead
+        # of in DoubleVar instances so that neither the spinbox clicks nor the
+        # writes from set() have to go through Tcl variable tracers
+        self.spinboxes = dict()
         for i, (n, label) in enumerate(
             [
                 ("top", "Top:"),
@@ -1713,48 +2260,57 @@ class BorderSizeWidget(tkinter.LabelFrame):
                 ("left", "Left:"),
             ]
         ):
-            self.variables[n] = tkinter.DoubleVar()
-
-            # need to pass k and v as function arguments so that their value
-            # does not get overwritten each loop iteration
-            def callback(varname, idx, op, k_copy=n, v_copy=self.variables[n]):
-                assert op == "w"
-                getattr(self, "on_" + k_copy)(v_copy.get())
-
-            self.variables[n].trace("w", callback)
-
             tkinter.Label(self, text=label).grid(row=i, column=0, sticky=tkinter.W)
-            tkinter.Spinbox(
+            # need to pass n as function argument so that its value does not
+            # get overwritten each loop iteration
+            self.spinboxes[n] = tkinter.Spinbox(
                 self,
                 format="%.2f",
                 increment=1.0,
                 from_=0,
                 to=100,
                 width=5,
-                textvariable=self.variables[n],
-            ).grid(row=i, column=1)
+                command=lambda n_copy=n: self.on_spinbox(n_copy),
+            )
+            # Without a textvariable, edits are only noticed through events.
+            # Pasting with the mouse or inserting text from a script does not
+            # release a key, so the value is also read when the user confirms
+            # it or leaves the spinbox.
+            for sequence in ["<KeyRelease>", "<Return>", "<FocusOut>"]:
+                self.spinboxes[n].bind(
+                    sequence, lambda event, n_copy=n: self.on_spinbox(n_copy)
+                )
+            self.spinboxes[n].grid(row=i, column=1)
             tkinter.Label(self, text="mm").grid(row=i, column=2)
 
+    def on_spinbox(self, name):
+        try:
+            value = float(self.spinboxes[name].get())
+        except ValueError:
+            # the user is still typing
+            return
+        getattr(self, "on_" + name)(value)
+
     def on_top(self, value):
-        if getattr(self, "value", None) is None:
+        if self.value is None:
             return
         _, right, bottom, left = self.value
         self.set(value, right, bottom, left)
 
     def on_right(self, value):
-        if getattr(self, "value", None) is None:
+        if self.value is None:
             return
         top, _, bottom, left = self.value
         self.set(top, value, bottom, left)
 
     def on_bottom(self, value):
-        if getattr(self, "value", None) is None:
+        if self.value is None:
             return
         top, right, _, left = self.value
         self.set(top, right, value, left)
 
     def on_left(self, value):
-        if getattr(self, "value", None) is None:
+        if self.value is None:
             return
         top, right, bottom, _ = self.value
         self.set(top, right, bottom, value)
@@ -1764,28 +2320,42 @@ class BorderSizeWidget(tkinter.LabelFrame):
         # from before or otherwise we do not need to execute the callback in
         # the end
         state_changed = True
-        if getattr(self, "value", None) is not None:
-            state_changed = self.value != (top, right, bottom, left)
+        if self.value is not None:
+            state_changed = not lengths_near(self.value, (top, right, bottom, left))
+            if not state_changed:
+                # keep the borders the layout was computed with
+                top, right, bottom, left = self.value
         # execute callback if necessary
         if state_changed and self.callback is not None:
             self.callback((top, right, bottom, left))
         self.value = top, right, bottom, left
-        # only set variables that changed to not trigger multiple variable tracers
-        if self.variables["top"].get() != top:
-            self.variables["top"].set(top)
-        if self.variables["right"].get() != right:
-            self.variables["right"].set(right)
-        if self.variables["bottom"].get() != bottom:
-            self.variables["bottom"].set(bottom)
-        if self.variables["left"].get() != left:
-            self.variables["left"].set(left)
-
-
-class PostersizeWidget(tkinter.LabelFrame):
+        # only write back the spinboxes that do not show the value already so
+        # that the text the user is typing is left alone
+        for n, v in zip(["top", "right", "bottom", "left"], self.value):
+            spinbox = self.spinboxes[n]
+            try:
+                if abs(float(spinbox.get()) - v) < 0.005:
+                    continue
+            except ValueError:
+                pass
+            spinbox.delete(0, tkinter.END)
+            spinbox.insert(0, "%.2f" % v)
+
+
+# the value of PostersizeWidget, where size is a (custom_size, (width, height))
+# tuple
+PosterSize = namedtuple("PosterSize", ["mode", "size", "mult", "npages"])
+
+
+class PostersizeWidget(VariablesFrame):
     def __init__(self, parent, *args, **kw):
         tkinter.LabelFrame.__init__(self, parent, text="Poster Size", *args, **kw)
 
         self.callback = None
+        self.value = None
+        self.pending_callback = None
+        # the state that set() last configured for each child widget
+        self.widget_states = {}
 
         self.variables = {
             "radio": tkinter.StringVar(),
@@ -1797,11 +2367,11 @@ class PostersizeWidget(tkinter.LabelFrame):
         }
 
         for k, v in self.variables.items():
-            # need to pass k and v as function arguments so that their value
-            # does not get overwritten each loop iteration
-            def callback(varname, idx, op, k_copy=k, v_copy=v):
+            # need to pass k as function argument so that its value does not
+            # get overwritten each loop iteration
+            def callback(varname, idx, op, k_copy=k):
                 assert op == "w"
-                getattr(self, "on_" + k_copy)(v_copy.get())
+                self._on_variable(k_copy)
 
             v.trace("w", callback)
 
@@ -1906,96 +2476,141 @@ class PostersizeWidget(tkinter.LabelFrame):
             name="npages_spinbox",
         ).grid(row=7, column=1, sticky=tkinter.W)
 
+    # The handlers below only replace the field of self.value that belongs to
+    # their variable and pass everything else on to set() as it is.
     def on_radio(self, value):
-        _, size, mult, npages = self.value
-        self.set(value, size, mult, npages)
+        self.set(*self.value._replace(mode=value))
 
     def on_dropdown(self, value):
-        mode, (custom_size, size), mult, npages = self.value
+        _, size = self.value.size
         if value == "custom":
-            custom_size = True
+            new_size = (True, size)
         else:
-            custom_size = False
-            size = PAGE_SIZES[value]
-        self.set(mode, (custom_size, size), mult, npages)
+            new_size = (False, PAGE_SIZES[value])
+        if new_size == self.value.size:
+            return
+        self.set(*self.value._replace(size=new_size))
 
     def on_width(self, value):
-        if getattr(self, "value", None) is None:
+        if self.value is None:
+            return
+        custom_size, (width, height) = self.value.size
+        if value == width:
             return
-        mode, (custom_size, (_, height)), mult, npages = self.value
-        self.set(mode, (custom_size, (value, height)), mult, npages)
+        self.set(*self.value._replace(size=(custom_size, (value, height))))
 
     def on_height(self, value):
-        if getattr(self, "value", None) is None:
+        if self.value is None:
+            return
+        custom_size, (width, height) = self.value.size
+        if value == height:
             return
-        mode, (custom_size, (width, _)), mult, npages = self.value
-        self.set(mode, (custom_size, (width, value)), mult, npages)
+        self.set(*self.value._replace(size=(custom_size, (width, value))))
 
     def on_multiplier(self, value):
-        if getattr(self, "value", None) is None:
+        if self.value is None:
             return
-        mode, size, _, npages = self.value
-        self.set(mode, size, value, npages)
+        if value == self.value.mult:
+            return
+        self.set(*self.value._replace(mult=value))
 
     def on_pages(self, value):
-        if getattr(self, "value", None) is None:
+        if self.value is None:
+            return
+        if value == self.value.npages:
             return
-        mode, size, mult, _ = self.value
-        self.set(mode, size, mult, value)
+        self.set(*self.value._replace(npages=value))
+
+    def run_callback(self):
+        self.pending_callback = None
+        if self.callback is None:
+            return
+        callback = self.callback
+        result = callback(self.value)
+        # show the values computed by the callback without running it again
+        self.callback = None
+        try:
+            self.set(*result)
+        finally:
+            self.callback = callback
 
     def set(self, mode, size, mult, npages):
         # before setting self.value, check if the effective value is different
         # from before or otherwise we do not need to execute the callback in
         # the end
         state_changed = True
-        if getattr(self, "value", None) is not None:
-            if mode == self.value[0] == "size":
-                state_changed = self.value[1][1] != size[1]
-            elif mode == self.value[0] == "mult":
-                state_changed = self.value[2] != mult
-            elif mode == self.value[0] == "npages":
-                state_changed = self.value[3] != npages
-        # execute callback if necessary
+        if self.value is not None:
+            if mode == self.value.mode == "size":
+                state_changed = self.value.size[1] != size[1]
+            elif mode == self.value.mode == "mult":
+                state_changed = self.value.mult != mult
+            elif mode == self.value.mode == "npages":
+                state_changed = self.value.npages != npages
+        # fast path for setting the same value again or dragging a spinbox: if
+        # the value is unchanged or if the mode stays the same and the dropdown
+        # keeps showing "custom", then neither the widget states nor the
+        # dropdown and radio variables can change
+        fast_path = self.value is not None and (
+            self.value == (mode, size, mult, npages)
+            or (
+                mode == self.value.mode
+                and (mode != "size" or (size[0] and self.value.size[0]))
+            )
+        )
+        # Execute callback if necessary. While a spinbox is dragged, set() is
+        # called for every step and the callback recomputes the layout every
+        # time, so it only runs once no new value arrived for 50 ms. The
+        # values it returns are written back by run_callback().
         if state_changed and self.callback is not None:
-            mode, size, mult, npages = self.callback((mode, size, mult, npages))
-        self.value = (mode, size, mult, npages)
+            if self.pending_callback is not None:
+                self.after_cancel(self.pending_callback)
+            self.pending_callback = self.after(50, self.run_callback)
+        self.value = PosterSize(mode, size, mult, npages)
         custom_size, (width, height) = size
-        # cycle through all widgets and set the state accordingly
-        for k, v in self.children.items():
-            if k.endswith("_radio"):
-                v.configure(state=tkinter.NORMAL)
-                continue
-            if not k.startswith(mode + "_"):
-                v.configure(state=tkinter.DISABLED)
-                continue
-            if k in ["size_dropdown", "size_radio"]:
-                v.configure(state=tkinter.NORMAL)
-                continue
-            if mode != "size":
-                v.configure(state=tkinter.NORMAL)
-                continue
-            if custom_size:
-                v.configure(state=tkinter.NORMAL)
-                continue
-            v.configure(state=tkinter.DISABLED)
-        # only set variables that changed to not trigger multiple variable tracers
-        if custom_size or mode != "size":
-            if self.variables["dropdown"].get() != "custom":
-                self.variables["dropdown"].set("custom")
-        else:
-            val = dict(zip(PAGE_SIZES.values(), PAGE_SIZES.keys()))[(width, height)]
-            if self.variables["dropdown"].get() != val:
-                self.variables["dropdown"].set(val)
-        if self.variables["radio"].get() != mode:
-            self.variables["radio"].set(mode)
-        if self.variables["width"].get() != width:
-            self.variables["width"].set(width)
-        if self.variables["height"].get() != height:
-            self.variables["height"].set(height)
-        if self.variables["multiplier"].get() != mult:
-            self.variables["multiplier"].set(mult)
-        if self.variables["pages"].get() != npages:
-            self.variables["pages"].set(npages)
+        if not fast_path:
+            # cycle through all widgets and set the state accordingly but
+            # only configure the widgets whose state changes
+            for k, v in self.children.items():
+                if k.endswith("_radio"):
+                    state = tkinter.NORMAL
+                elif not k.startswith(mode + "_"):
+                    state = tkinter.DISABLED
+                elif k in ["size_dropdown", "size_radio"]:
+                    state = tkinter.NORMAL
+                elif mode != "size":
+                    state = tkinter.NORMAL
+                elif custom_size:
+                    state = tkinter.NORMAL
+                else:
+                    state = tkinter.DISABLED
+                if self.widget_states.get(k) != state:
+                    v.configure(state=state)
+                    self.widget_states[k] = state
+        # Only set variables that changed and keep the variable tracers quiet
+        # while doing so. This also happens if self.value did not change, so
+        # that text the user typed but that could not be parsed is replaced.
+        updates = []
+        if not fast_path:
+            if custom_size or mode != "size":
+                val = "custom"
+            else:
+                val = PAGE_SIZES_REVERSE.get((width, height), "custom")
+            updates += [("dropdown", val), ("radio", mode)]
+        updates += [
+            ("width", width),
+            ("height", height),
+            ("multiplier", mult),
+            ("pages", npages),
+        ]
+        with self._batch_updates():
+            for name, new in updates:
+                variable = self.variables[name]
+                try:
+                    current = variable.get()
+                except tkinter.TclError:
+                    current = None
+                if current != new:
+                    variable.set(new)
 
 
 def compute_layout(
@@ -2014,7 +2629,80 @@ def compute_layout(
     guides=False,
     numbers=False,
     poster_border=False,
+    jobs=1,
 ):
+    if isinstance(infile, bytes):
+        # infile is the content of the input file
+        infile = BytesIO(infile)
+    if hasattr(infile, "read"):
+        doc = _open_document(infile, remove_alpha)
+        plakativ = Plakativ(doc, pagenr)
+        plakativ.compute_layout(mode, size, mult, npages, pagesize, border, strategy)
+        plakativ.render(outfile, cover, guides, numbers, poster_border, jobs)
+        doc.close()
+        return
+    stat = os.stat(infile)
+    # the cached Plakativ object is shared, so only one caller may use it
+    with _plakativ_lock:
+        plakativ = _get_plakativ(
+            infile, stat.st_mtime_ns, stat.st_size, pagenr, remove_alpha
+        )
+        plakativ.compute_layout(mode, size, mult, npages, pagesize, border, strategy)
+        plakativ.render(outfile, cover, guides, numbers, poster_border, jobs)
+
+
+# the extensions of the document and image types that MuPDF can open
+FITZ_FILETYPES = (
+    "pdf",
+    "xps",
+    "oxps",
+    "epub",
+    "mobi",
+    "fb2",
+    "cbz",
+    "svg",
+    "png",
+    "jpg",
+    "jpeg",
+    "bmp",
+    "gif",
+    "tif",
+    "tiff",
+    "pnm",
+    "pgm",
+    "pbm",
+    "ppm",
+    "pam",
+    "jxr",
+    "jpx",
+    "jp2",
+)
+
+
+# Opening and parsing the input is the most expensive step when the same file
+# is turned into posters over and over again with different settings, so the
+# Plakativ object of the last input file is kept. Only one is kept because
+# its document stays in memory for as long as it is cached. The modification
+# time and the size of the file are part of the key so that changed files are
+# opened again, even if they were rewritten within the resolution of the
+# modification time. The file is read into memory so that the cached document
+# does not keep it open, which would prevent removing it on Windows.
+@lru_cache(maxsize=1)
+def _get_plakativ(infile, mtime_ns, size, pagenr, remove_alpha):
+    # Reading from memory, MuPDF cannot look at the filename, so the type is
+    # taken from the extension. Unknown extensions are treated as PDF, like
+    # the file objects passed to compute_layout().
+    filetype = os.path.splitext(infile)[1][1:].lower()
+    if filetype not in FITZ_FILETYPES:
+        filetype = "application/pdf"
+    with open(infile, "rb") as f:
+        return Plakativ(_open_document(f, remove_alpha, filetype), pagenr)
+
+
+_plakativ_lock = threading.Lock()
+
+
+def _open_document(infile, remove_alpha, filetype="application/pdf"):
     doc = None
     if hasattr(infile, "read"):
         # we have to slurp in the whole file because we potentially read it
@@ -2027,9 +2715,6 @@ def compute_layout(
         # into a PDF container
         data = None
         try:
-            # FIXME: img2pdf should not use the root logger so that instead we
-            #        can run logging.getLogger('img2pdf').setLevel(logging.CRITICAL)
-            logging.getLogger().setLevel(logging.CRITICAL)
             data = img2pdf.convert(infile)
         except img2pdf.AlphaChannelError:
             if remove_alpha:
@@ -2044,14 +2729,7 @@ def compute_layout(
                     output.seek(0)
                     data = img2pdf.convert(output)
             else:
-                print(
-                    """
-Plakativ is lossless by default. To automatically remove the alpha channel from
-the input and place the image on a white background, use the --remove-alpha
-option""",
-                    file=sys.stderr,
-                )
-                exit(1)
+                raise AlphaChannelException()
         except img2pdf.ImageOpenError:
             # img2pdf cannot handle this
             pass
@@ -2064,18 +2742,21 @@ option""",
         # either we didn't have img2pdf or opening the input with img2pdf
         # failed
         if hasattr(infile, "read"):
-            doc = fitz.open(stream=infile, filetype="application/pdf")
+            doc = fitz.open(stream=infile, filetype=filetype)
         else:
             doc = fitz.open(filename=infile)
-    plakativ = Plakativ(doc, pagenr)
-    plakativ.compute_layout(mode, size, mult, npages, pagesize, border, strategy)
-    plakativ.render(outfile, cover, guides, numbers, poster_border)
-    doc.close()
+    return doc
 
 
 def gui(filename=None):
+    global have_numba
     if not have_tkinter:
         raise Exception("the GUI requires tkinter")
+    # Compiling with numba would block the GUI for several seconds on the
+    # first complex layout and again for every new combination of argument
+    # types. The plain Python search takes a few tens of milliseconds per
+    # layout, which is fast enough for the GUI.
+    have_numba = False
     root = tkinter.Tk()
     app = Application(master=root)
     if filename is not None:
@@ -2125,6 +2806,16 @@ def parse_num(num, name):
     return num
 
 
+def parse_jobs(string):
+    try:
+        jobs = int(string)
+    except ValueError:
+        raise argparse.ArgumentTypeError("jobs is not an integer: %s" % string)
+    if jobs < 0:
+        raise argparse.ArgumentTypeError("jobs must not be negative: %d" % jobs)
+    return jobs
+
+
 def parse_borderarg(string):
     if ":" in string:
         vals = string.split(":")
@@ -2172,6 +2863,11 @@ def parse_pagesize_rectarg(string):
 
 
 def main():
+    # The Windows executable is frozen with PyInstaller. Without this call, the
+    # worker processes rendering pages or processing inputs in parallel would
+    # run the whole program again instead of their task.
+    multiprocessing.freeze_support()
+
     if len(sys.argv) == 1 and platform.system() != "Windows":
         print(
             """
@@ -2335,8 +3031,15 @@ Report bugs at https://gitlab.mister-muffin.de/josch/plakativ/issues
         "Cannot be used together with --size or --factor.",
     )
 
-    parser.add_argument("-o", "--output", help="output filename (default: stdout)")
-    parser.add_argument("input", nargs="?", help="input filename (default: stdin)")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="output filename (default: stdout or, with multiple inputs, the "
+        "input filename with _poster.pdf instead of its extension)",
+    )
+    parser.add_argument(
+        "input", nargs="*", help="input filename or filenames (default: stdin)"
+    )
     parser.add_argument(
         "--pagenum",
         type=int,
@@ -2415,18 +3118,56 @@ Report bugs at https://gitlab.mister-muffin.de/josch/plakativ/issues
         "this option will print a light-gray dashed border around the whole "
         "poster, so that it can be accurately cut to the correct overall size.",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=parse_jobs,
+        help="Number of processes rendering the output pages in parallel or, "
+        "with multiple inputs, the number of inputs processed in parallel. "
+        "With 0, one process per CPU is used. For a single input this is only "
+        "worth it for posters with many pages (default: 1 for a single input, "
+        "one per CPU for multiple inputs)",
+    )
 
     args = parser.parse_args()
 
     if args.gui:
-        gui(args.input)
+        if len(args.input) > 1:
+            parser.error("the GUI can only open one input")
+        gui(args.input[0] if args.input else None)
         sys.exit(0)
 
-    if not args.input or args.input == "-":
-        args.input = sys.stdin.buffer
-
-    if not args.output or args.output == "-":
-        args.output = sys.stdout.buffer
+    if len(args.input) > 1:
+        if args.output:
+            parser.error("--output cannot be used with multiple inputs")
+        if "-" in args.input:
+            parser.error("stdin cannot be used with multiple inputs")
+        outputs = [os.path.splitext(infile)[0] + "_poster.pdf" for infile in args.input]
+        # the inputs are processed in parallel, so no output must be written
+        # twice or overwrite an input that another process is still reading
+        inputs = {}
+        for infile in args.input:
+            inputs[os.path.normcase(os.path.realpath(infile))] = infile
+        seen = {}
+        for infile, outfile in zip(args.input, outputs):
+            path = os.path.normcase(os.path.realpath(outfile))
+            if path in seen:
+                parser.error(
+                    "%s and %s would both be written to %s"
+                    % (seen[path], infile, outfile)
+                )
+            if path in inputs:
+                parser.error(
+                    "the output for %s would overwrite the input %s"
+                    % (infile, inputs[path])
+                )
+            seen[path] = infile
+    else:
+        if not args.input or args.input[0] == "-":
+            args.input = [sys.stdin.buffer]
+        if not args.output or args.output == "-":
+            args.output = sys.stdout.buffer
+        outputs = [args.output]
 
     if isinstance(args.mode, tuple):
         mode = "size"
@@ -2442,10 +3183,9 @@ Report bugs at https://gitlab.mister-muffin.de/josch/plakativ/issues
         parser.print_usage(sys.stderr)
         sys.exit(1)
 
-    compute_layout(
-        args.input,
-        args.output,
-        mode,
+    _silence_logging()
+
+    kwargs = dict(
         pagenr=args.pagenum - 1,  # zero based
         pagesize=args.pagesize,
         border=args.border,
@@ -2457,9 +3197,65 @@ Report bugs at https://gitlab.mister-muffin.de/josch/plakativ/issues
         numbers=args.page_numbers,
         poster_border=args.poster_border,
     )
+    try:
+        if len(args.input) == 1:
+            if args.jobs is None:
+                jobs = 1
+            else:
+                jobs = args.jobs or None
+            compute_layout(args.input[0], outputs[0], mode, jobs=jobs, **kwargs)
+        else:
+            # every input is turned into a poster by its own process and the
+            # pages of each poster are rendered one after another
+            tasks = [
+                (infile, outfile, mode, kwargs)
+                for infile, outfile in zip(args.input, outputs)
+            ]
+            jobs = min(args.jobs or os.cpu_count() or 1, len(tasks))
+            if jobs == 1:
+                # starting a process would only add to the time it takes
+                for task in tasks:
+                    _compute_layout_worker(task)
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=jobs, initializer=_silence_logging
+                ) as executor:
+                    for _ in executor.map(_compute_layout_worker, tasks):
+                        pass
+    except AlphaChannelException:
+        print(
+            """
+Plakativ is lossless by default. To automatically remove the alpha channel from
+the input and place the image on a white background, use the --remove-alpha
+option""",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+# This is only done on the command line, so that programs using plakativ as a
+# library or running its GUI keep their log messages. Worker processes do not
+# inherit the log level on all platforms, so they call this as well.
+def _silence_logging():
+    # FIXME: img2pdf should not use the root logger so that instead we
+    #        can run logging.getLogger('img2pdf').setLevel(logging.CRITICAL)
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+
+# Errors are raised as exceptions in the worker process and reported by main()
+# once they were passed back to the parent.
+def _compute_layout_worker(args):
+    infile, outfile, mode, kwargs = args
+    compute_layout(infile, outfile, mode, **kwargs)
 
 
 if __name__ == "__main__":
     main()
 
-__all__ = ["Plakativ", "compute_layout", "simple_cover", "complex_cover"]
+__all__ = [
+    "Plakativ",
+    "compute_layout",
+    "simple_cover",
+    "simple_cover_count",
+    "complex_cover",
+]
@@ -1,10 +1,12 @@
 import pytest
 import plakativ
-import tempfile
 import fitz
 import fitz.utils
 import os
-import math
+import re
+import subprocess
+import sys
+from io import BytesIO
 
 
 def mm_to_pt(length):
@@ -12,43 +14,46 @@ def mm_to_pt(length):
 
 
 def _create_pdf(width, height):
-    return tmpfile
-
+    doc = fitz.open()
+    page = doc.new_page(pno=-1, width=width, height=height)
+    img = page.new_shape()
 
-@pytest.fixture(scope="module")
-def infile_a4_portrait():
-    tmpfile = _create_pdf(mm_to_pt(210), mm_to_pt(297))
-    yield tmpfile
-    os.unlink(tmpfile)
+    red = fitz.utils.getColor("red")
+    green = fitz.utils.getColor("green")
+    blue = fitz.utils.getColor("blue")
+    orange = fitz.utils.getColor("orange")
 
+    img.insertText(fitz.Point(97, 620), "A", fontsize=600, color=blue)
+    img.commit()
+    img.drawLine(fitz.Point(0, 0), fitz.Point(width, height))
+    img.finish(color=red)
+    img.drawLine(fitz.Point(0, height), fitz.Point(width, 0))
+    img.finish(color=green)
+    img.drawRect(fitz.Rect(fitz.Point(0, 0), fitz.Point(width, height)))
+    img.finish(color=orange)
+    img.commit()
 
-@pytest.fixture(scope="module")
-def infile_custom_portrait():
-    tmpfile = _create_pdf(mm_to_pt(200), mm_to_pt(400))
-    yield tmpfile
-    os.unlink(tmpfile)
+    data = doc.write(pretty=True, expand=255)
+    doc.close()
+    return data
 
 
+# input documents created by _create_pdf(), shared by all tests of the module
+# that use the same input page size
 @pytest.fixture(scope="module")
-def infile_a4_landscape():
-    tmpfile = _create_pdf(mm_to_pt(297), mm_to_pt(210))
-    yield tmpfile
-    os.unlink(tmpfile)
+def infiles():
+    data = {}
 
+    def get(width, height):
+        if (width, height) not in data:
+            data[(width, height)] = _create_pdf(width, height)
+        return data[(width, height)]
 
-@pytest.fixture(scope="module")
-def infile_custom_landscape():
-    tmpfile = _create_pdf(mm_to_pt(400), mm_to_pt(200))
-    yield tmpfile
-    os.unlink(tmpfile)
+    return get
 
 
-@pytest.fixture(scope="module")
-def infile_custom_square():
-    tmpfile = _create_pdf(mm_to_pt(300), mm_to_pt(300))
-    yield tmpfile
-    os.unlink(tmpfile)
-
+# matches the /BBox and /Matrix entries of a PDF dictionary
+_bbox_matrix_re = re.compile(r"/(BBox|Matrix)\s*\[([^\]]+)\]")
 
 _formats = {
     "dina4_portrait": (210, 297),
@@ -144,38 +149,12 @@ _formats = {
         ),
     ],
 )
-def test_cases(postersize, input_pagesize, output_pagesize, strategy, expected):
-    width = mm_to_pt(input_pagesize[0])
-    height = mm_to_pt(input_pagesize[1])
-
-    doc = fitz.open()
-    page = doc.new_page(pno=-1, width=width, height=height)
-    img = page.new_shape()
+def test_cases(
+    postersize, input_pagesize, output_pagesize, strategy, expected, infiles
+):
+    infile = infiles(mm_to_pt(input_pagesize[0]), mm_to_pt(input_pagesize[1]))
 
-    red = fitz.utils.getColor("red")
-    green = fitz.utils.getColor("green")
-    blue = fitz.utils.getColor("blue")
-    orange = fitz.utils.getColor("orange")
-
-    img.insertText(fitz.Point(97, 620), "A", fontsize=600, color=blue)
-    img.commit()
-    img.drawLine(fitz.Point(0, 0), fitz.Point(width, height))
-    img.finish(color=red)
-    img.drawLine(fitz.Point(0, height), fitz.Point(width, 0))
-    img.finish(color=green)
-    img.drawRect(fitz.Rect(fitz.Point(0, 0), fitz.Point(width, height)))
-    img.finish(color=orange)
-    img.commit()
-
-    fd, infile = tempfile.mkstemp(
-        prefix="plakativ", suffix="%f_%f.pdf" % (width, height)
-    )
-    os.close(fd)
-    doc.save(infile, pretty=True, expand=255)
-    doc.close()
-
-    fd, outfile = tempfile.mkstemp(prefix="plakativ")
-    os.close(fd)
+    outfile = BytesIO()
     plakativ.compute_layout(
         infile,
         outfile,
@@ -185,9 +164,8 @@ def test_cases(postersize, input_pagesize, output_pagesize, strategy, expected):
         border=(20, 20, 20, 20),
         strategy=strategy,
     )
-    os.unlink(infile)
 
-    doc = fitz.open(outfile)
+    doc = fitz.open(stream=outfile.getvalue(), filetype="application/pdf")
 
     for pnum, (bbox, matrix) in zip(range(doc.page_count), expected):
         xreflist = doc._getPageInfo(pnum, 3)
@@ -207,18 +185,149 @@ def test_cases(postersize, input_pagesize, output_pagesize, strategy, expected):
         #        >>
         #        /Length 12
         #      >>
-        keyvals = dict(
-            tuple(line.strip().split(maxsplit=1))
-            for line in doc.xref_object(xref).splitlines()
-            if " " in line.strip()
+        keyvals = dict(_bbox_matrix_re.findall(doc.xref_object(xref)))
+        assert "BBox" in keyvals
+        newbbox = keyvals["BBox"].split()
+        assert list(map(float, newbbox)) == pytest.approx(
+            list(map(float, bbox)), abs=0.00001
+        )
+        assert "Matrix" in keyvals
+        newmatrix = keyvals["Matrix"].split()
+        assert list(map(float, newmatrix)) == pytest.approx(
+            list(map(float, matrix)), abs=0.00001
         )
-        assert "/BBox" in keyvals
-        newbbox = keyvals["/BBox"].strip(" []").split()
-        for v1, v2 in zip(bbox, newbbox):
-            assert math.isclose(float(v1), float(v2), abs_tol=0.00001)
-        assert "/Matrix" in keyvals
-        newmatrix = keyvals["/Matrix"].strip(" []").split()
-        for v1, v2 in zip(matrix, newmatrix):
-            assert math.isclose(float(v1), float(v2), abs_tol=0.00001)
     doc.close()
-    os.unlink(outfile)
+
+
+@pytest.mark.parametrize(
+    "postersize,pagesize,simple,complex",
+    [
+        ((420, 594), (180, 267), 8, 6),
+        ((594, 841), (180, 267), 15, 12),
+        ((841, 594), (180, 267), 15, 12),
+        ((841, 1189), (180, 267), 25, 24),
+        ((1189, 1682), (180, 267), 49, 45),
+        ((500, 500), (180, 267), 6, 6),
+    ],
+)
+def test_cover_page_count(postersize, pagesize, simple, complex):
+    config, _ = plakativ.simple_cover(*postersize, *pagesize)
+    assert len(config) == simple
+    config = plakativ.complex_cover(*postersize, *pagesize)
+    assert len(config) == complex
+    # the count used by the npages bisection must agree with the layout
+    assert plakativ._complex_cover_count(*postersize, *pagesize) == complex
+    for posx, posy, portrait in config:
+        if portrait:
+            width, height = pagesize
+        else:
+            height, width = pagesize
+        # every page overlaps with the poster
+        assert -width < posx < postersize[0]
+        assert -height < posy < postersize[1]
+
+
+def test_render_jobs():
+    doc = fitz.open()
+    page = doc.new_page(pno=-1, width=mm_to_pt(210), height=mm_to_pt(297))
+    img = page.new_shape()
+    img.drawRect(fitz.Rect(10, 10, 100, 100))
+    img.finish(color=(1, 0, 0))
+    img.commit()
+    p = plakativ.Plakativ(doc)
+    p.compute_layout("size", (841, 1189), strategy="complex")
+    serial = BytesIO()
+    p.render(serial, guides=True, numbers=True)
+    parallel = BytesIO()
+    p.render(parallel, guides=True, numbers=True, jobs=3)
+    serial = fitz.open(stream=serial.getvalue(), filetype="application/pdf")
+    parallel = fitz.open(stream=parallel.getvalue(), filetype="application/pdf")
+    assert serial.page_count == parallel.page_count == 18
+    for page1, page2 in zip(serial, parallel):
+        assert page1.rect == page2.rect
+        assert page1.get_text() == page2.get_text()
+
+
+# plakativ can be used without a GUI on systems where tkinter is not available,
+# and numba is only imported once the complex layouter is needed
+def test_import_without_tkinter():
+    code = (
+        "import sys\n"
+        "sys.modules['tkinter'] = None\n"
+        "import plakativ\n"
+        "assert not plakativ.have_tkinter\n"
+        "assert 'numba' not in sys.modules\n"
+        "assert len(plakativ.complex_cover(594, 841, 180, 267)) == 12\n"
+    )
+    subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        check=True,
+    )
+
+
+# compute_layout() keeps the last input file in memory, but must notice when it
+# was rewritten, even within the resolution of its modification time
+def test_compute_layout_rewritten_input(infiles, tmp_path):
+    infile = tmp_path / "input.pdf"
+    npages = []
+    for size in ["dina4_portrait", "dina3_portrait"]:
+        stat = infile.stat() if infile.exists() else None
+        infile.write_bytes(infiles(*map(mm_to_pt, _formats[size])))
+        if stat is not None:
+            os.utime(infile, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        outfile = BytesIO()
+        plakativ.compute_layout(str(infile), outfile, mode="mult", mult=2.0)
+        doc = fitz.open(stream=outfile.getvalue(), filetype="application/pdf")
+        npages.append(doc.page_count)
+        doc.close()
+    assert npages == [3, 6]
+
+
+# the type of an input file is only taken from its extension if MuPDF knows it
+@pytest.mark.parametrize("name", ["input.dat", "input.pdf~", "input"])
+def test_compute_layout_odd_extension(name, infiles, tmp_path):
+    infile = tmp_path / name
+    infile.write_bytes(infiles(*map(mm_to_pt, _formats["dina4_portrait"])))
+    outfile = BytesIO()
+    plakativ.compute_layout(str(infile), outfile, mode="mult", mult=2.0)
+    doc = fitz.open(stream=outfile.getvalue(), filetype="application/pdf")
+    assert doc.page_count == 3
+    doc.close()
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_main_multiple_inputs(jobs, infiles, tmp_path, monkeypatch):
+    inputs = []
+    for name, size in [("a", "dina4_portrait"), ("b", "dina4_landscape")]:
+        infile = tmp_path / (name + ".pdf")
+        infile.write_bytes(infiles(*map(mm_to_pt, _formats[size])))
+        inputs.append(str(infile))
+    monkeypatch.setattr(
+        sys, "argv", ["plakativ", "--size", "A3", "--jobs", jobs] + inputs
+    )
+    plakativ.main()
+    for name in ["a", "b"]:
+        doc = fitz.open(tmp_path / (name + "_poster.pdf"))
+        assert doc.page_count == 4
+        doc.close()
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["a.pdf", "a.png"],
+        ["a.pdf", "a_poster.pdf"],
+        ["a.pdf", "a.pdf"],
+        ["--output", "out.pdf", "a.pdf", "b.pdf"],
+        ["a.pdf", "-"],
+        ["--gui", "a.pdf", "b.pdf"],
+    ],
+)
+def test_main_usage_errors(args, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["plakativ", "--size", "A3"] + args)
+    with pytest.raises(SystemExit) as excinfo:
+        plakativ.main()
+    assert excinfo.value.code == 2
+    assert list(tmp_path.iterdir()) == []